@@ -0,0 +1,183 @@
+from collections.abc import Iterator
+
+# Squares are numbered 0 (a1) to 63 (h8), rank by rank, so bit n of a bitboard is set when square n is occupied.
+
+PAWN, KNIGHT, BISHOP, ROOK, QUEEN, KING = range(6)
+
+WHITE, BLACK = 0, 1
+
+# FILES[f] holds every square of file f, 0 for the a-file to 7 for the h-file.
+FILES = tuple(0x0101010101010101 << file for file in range(8))
+
+# (file step, rank step) of every ray direction
+ROOK_DIRECTIONS = ((1, 0), (-1, 0), (0, 1), (0, -1))
+BISHOP_DIRECTIONS = ((1, 1), (1, -1), (-1, 1), (-1, -1))
+
+
+def bit(square: int) -> int:
+    return 1 << square
+
+
+def bits(bb: int) -> Iterator[int]:
+    """
+    Iterate over the set squares of a bitboard, lowest square first.
+
+    Parameters:
+    bb (int): The bitboard to walk.
+
+    Yields:
+    int: The index of every set bit.
+    """
+    while bb:
+        lsb = bb & -bb
+        yield lsb.bit_length() - 1
+        bb ^= lsb
+
+
+def _offsets_mask(square: int, offsets) -> int:
+    file, rank = square % 8, square // 8
+    mask = 0
+    for df, dr in offsets:
+        f, r = file + df, rank + dr
+        if 0 <= f < 8 and 0 <= r < 8:
+            mask |= bit(r * 8 + f)
+    return mask
+
+
+def _ray(square: int, direction: tuple[int, int]) -> list[int]:
+    df, dr = direction
+    f, r = square % 8 + df, square // 8 + dr
+    squares = []
+    while 0 <= f < 8 and 0 <= r < 8:
+        squares.append(r * 8 + f)
+        f += df
+        r += dr
+    return squares
+
+
+KNIGHT_ATTACKS = tuple(_offsets_mask(sq, ((1, 2), (2, 1), (2, -1), (1, -2), (-1, -2), (-2, -1), (-2, 1), (-1, 2))) for sq in range(64))
+KING_ATTACKS = tuple(_offsets_mask(sq, ((1, 0), (1, 1), (0, 1), (-1, 1), (-1, 0), (-1, -1), (0, -1), (1, -1))) for sq in range(64))
+# PAWN_ATTACKS[color][square] are the squares a pawn of that color standing on square attacks.
+PAWN_ATTACKS = (tuple(_offsets_mask(sq, ((-1, 1), (1, 1))) for sq in range(64)),
+                tuple(_offsets_mask(sq, ((-1, -1), (1, -1))) for sq in range(64)))
+# PAWN_PUSHES[color][square] is the square one step ahead, PAWN_DOUBLE_PUSHES[color][square] the one two steps ahead
+# from the pawn's starting rank (0 elsewhere).
+PAWN_PUSHES = (tuple(_offsets_mask(sq, ((0, 1),)) for sq in range(64)),
+               tuple(_offsets_mask(sq, ((0, -1),)) for sq in range(64)))
+PAWN_DOUBLE_PUSHES = (tuple(bit(sq + 16) if sq // 8 == 1 else 0 for sq in range(64)),
+                      tuple(bit(sq - 16) if sq // 8 == 6 else 0 for sq in range(64)))
+
+# RAYS[direction][square] lists the squares from square outwards, nearest first.
+RAYS = {direction: tuple(tuple(_ray(sq, direction)) for sq in range(64)) for direction in ROOK_DIRECTIONS + BISHOP_DIRECTIONS}
+
+
+def _build_between() -> tuple[tuple[int, ...], ...]:
+    between = [[0] * 64 for _ in range(64)]
+    for start in range(64):
+        for ray in (RAYS[direction][start] for direction in RAYS):
+            mask = 0
+            for square in ray:
+                between[start][square] = mask
+                mask |= bit(square)
+    return tuple(tuple(row) for row in between)
+
+
+# BETWEEN[a][b] holds the squares strictly between a and b when they share a rank, file or diagonal, else 0.
+BETWEEN = _build_between()
+
+
+def _slider_attacks(square: int, occupied: int, directions) -> int:
+    attacks = 0
+    for direction in directions:
+        for target in RAYS[direction][square]:
+            attacks |= bit(target)
+            if occupied & bit(target):
+                break
+    return attacks
+
+
+def _relevant_occupancy(square: int, directions) -> int:
+    # The last square of a ray never blocks anything behind it, so it doesn't need to be part of the magic index.
+    mask = 0
+    for direction in directions:
+        for target in RAYS[direction][square][:-1]:
+            mask |= bit(target)
+    return mask
+
+
+# Magic multipliers for every square, found offline by random search: ((occupied & mask) * magic) >> shift maps every
+# relevant blocker set of the square to a table slot without conflicting collisions.
+ROOK_MAGICS = (
+    0x00800124C0081080, 0x0240100040002004, 0x0200102200400880, 0x8080100080080004,
+    0x1080080002040081, 0x0180020080030400, 0x0400080201009430, 0x008001000058A280,
+    0x0001002041008005, 0x1060400040201006, 0x0082808020001000, 0x1241001001000B20,
+    0x1800800800040080, 0x001A001008050200, 0x0404808002000100, 0x0101000080510022,
+    0x0038450020800100, 0x0880404010002000, 0x0120010020110040, 0xC118808010000802,
+    0x01A0808008000400, 0x0008808002000400, 0x8180040001420810, 0x002206000042840B,
+    0x4000400180022080, 0x1200200240100242, 0x2200401100200100, 0x1062100480080082,
+    0x0208008880040080, 0x0000040080020080, 0x301A010080800200, 0x0000008200004124,
+    0x9880004000402000, 0x04D0002000400052, 0x1000410019002000, 0x0008420012002008,
+    0x0800800400800801, 0x0078020080800400, 0x300008A204000110, 0x4000408042000104,
+    0x0840008000488020, 0x0010002000404000, 0x0052004080120020, 0x0A21041000090020,
+    0x50B0040801010010, 0x2002000804010100, 0x0500080102040010, 0x0200410040820004,
+    0x0016010044208200, 0x8000822004400880, 0x0000402200108200, 0x1110000800801080,
+    0x0B18100500080100, 0x4900040002008080, 0x8801000402000100, 0x1100008054090200,
+    0x0001044020108003, 0x0002022248801102, 0x4002001020420982, 0x6000200C400A0006,
+    0x8102010810200402, 0x5002004408015002, 0x6000100201208804, 0xC418130408204082,
+)
+BISHOP_MAGICS = (
+    0x2120241040850010, 0x0010301214822418, 0x0008182040844000, 0x0A08208020000C40,
+    0x010510C008000000, 0x180082A060000490, 0x02430C0202415400, 0x0010440218020208,
+    0x41000AD090008100, 0x4008100420940048, 0x0A00410401004002, 0x6200082042401600,
+    0x0411240420010000, 0x0200010160100CA0, 0x200080849010D002, 0x2210011042100414,
+    0x8004926028300100, 0x8010000210210104, 0x0008000488210200, 0x0324008202120000,
+    0x040C022480A00182, 0x0009404201100154, 0x1A10441108267020, 0x0800890C40441000,
+    0x0422206208085018, 0x00B00800302200A6, 0xA000404084010202, 0x2008840008041010,
+    0x4020808010082000, 0x040081018A010080, 0x200102000110B000, 0x01140080810090B2,
+    0x0010090410610400, 0x8008121302880804, 0x8204020100122400, 0x0000200800190050,
+    0x2062020200040084, 0x02A0208082810800, 0x4010010240010C38, 0x0001640020010100,
+    0x1002100C14006100, 0x0804020804244201, 0x0304101088001011, 0x420800205800C302,
+    0x1000284100401400, 0xE011410116000B00, 0x4408020444003C48, 0x0810208081003080,
+    0x000088084210A842, 0x0082009094300200, 0x411002004A088802, 0x008A000784340000,
+    0x0008910810240008, 0x00000A2008208044, 0x0008488800A41404, 0x0002841440820022,
+    0x014A044048280800, 0x0042090041046000, 0x0600212044240400, 0x0010400000208840,
+    0x0240020010820200, 0x0020840410820208, 0x0400222002008101, 0x4121041002004211,
+)
+
+
+_MASK64 = (1 << 64) - 1
+
+
+def _build_magic_table(magics, directions):
+    masks, shifts, tables = [], [], []
+    for square, magic in enumerate(magics):
+        mask = _relevant_occupancy(square, directions)
+        shift = 64 - mask.bit_count()
+        table = [0] * (1 << mask.bit_count())
+        # Carry-Rippler trick: walk every subset of the mask.
+        blockers = 0
+        while True:
+            table[((blockers * magic) & _MASK64) >> shift] = _slider_attacks(square, blockers, directions)
+            blockers = (blockers - mask) & mask
+            if not blockers:
+                break
+        masks.append(mask)
+        shifts.append(shift)
+        tables.append(tuple(table))
+    return tuple(masks), tuple(shifts), tuple(tables)
+
+
+ROOK_MASKS, ROOK_SHIFTS, ROOK_TABLES = _build_magic_table(ROOK_MAGICS, ROOK_DIRECTIONS)
+BISHOP_MASKS, BISHOP_SHIFTS, BISHOP_TABLES = _build_magic_table(BISHOP_MAGICS, BISHOP_DIRECTIONS)
+
+
+def rook_attacks(square: int, occupied: int) -> int:
+    return ROOK_TABLES[square][(((occupied & ROOK_MASKS[square]) * ROOK_MAGICS[square]) & _MASK64) >> ROOK_SHIFTS[square]]
+
+
+def bishop_attacks(square: int, occupied: int) -> int:
+    return BISHOP_TABLES[square][(((occupied & BISHOP_MASKS[square]) * BISHOP_MAGICS[square]) & _MASK64) >> BISHOP_SHIFTS[square]]
+
+
+def queen_attacks(square: int, occupied: int) -> int:
+    return rook_attacks(square, occupied) | bishop_attacks(square, occupied)
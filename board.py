@@ -5,8 +5,26 @@ from copy import deepcopy
 from rich.console import Console
 from rich.text import Text
 
+import bitboard
+from bitboard import BETWEEN, KING_ATTACKS, KNIGHT_ATTACKS, PAWN_ATTACKS, bishop_attacks, rook_attacks
 from pieces import Piece
-from utils import Color, Location
+from utils import Color, COLOR_INDEX, Location, SQUARE_INDEX, SQUARE_NAMES
+
+
+def _build_intermediate_squares() -> tuple[tuple[tuple[Location, ...], ...], ...]:
+    locations = [Location(name) for name in SQUARE_NAMES]
+    table = [[()] * 64 for _ in range(64)]
+    for start in range(64):
+        for ray in bitboard.RAYS.values():
+            path = []
+            for square in ray[start]:
+                table[start][square] = tuple(path)
+                path.append(locations[square])
+    return tuple(tuple(row) for row in table)
+
+
+# _INTERMEDIATE_SQUARES[a][b] lists the squares strictly between a and b along a rank, file or diagonal, nearest to a first.
+_INTERMEDIATE_SQUARES = _build_intermediate_squares()
 
 
 class SuppressLoggingFilter(logging.Filter):
@@ -41,10 +59,11 @@ class Board:
             self.temp_board = None
             self.original_pieces = None
             self.original_captured = None
-            self.original_active_player = None
+            self.original_side = None
             self.original_moves = None
             self.original_turn_number = None
             self.original_halfmove_counter = None
+            self.original_king_sq = None
             self.enpassants = None
             self.filter = SuppressLoggingFilter()
             self.game.logger.addFilter(self.filter)
@@ -52,44 +71,53 @@ class Board:
         def __enter__(self):
             # Surpress logging for anything that happens during the temporary move.
             self.filter.suppress = True
-            self.temp_board = deepcopy(self.board)
-            self.original_pieces = deepcopy(self.game.pieces)
-            self.original_moves = deepcopy(self.game.moves)
-            self.original_captured = deepcopy(self.game.captured_pieces)
-            self.original_active_player = deepcopy(self.game.active_player)
+            # Share one memo so the restored board and piece collections hold the same piece objects.
+            memo = {}
+            self.temp_board = deepcopy(self.board, memo)
+            self.original_pieces = deepcopy(self.game.pieces, memo)
+            self.original_moves = deepcopy(self.game.moves, memo)
+            self.original_captured = deepcopy(self.game.captured_pieces, memo)
+            self.original_side = self.game.side
             self.original_turn_number = deepcopy(self.game.turn_number)
             self.enpassants = deepcopy(self.game.enpassants)
             self.original_halfmove_counter = deepcopy(self.game.halfmove_counter)
+            self.original_king_sq = dict(self.game.king_sq)
             return self.board
 
         def __exit__(self, exc_type, exc_val, exc_tb):
             # Allow logging again
             self.filter.suppress = False
-            self.board.squares.clear()
-            self.board.squares.update(self.temp_board.squares)
+            self.board.squares[:] = self.temp_board.squares
+            self.board.bb[:] = self.temp_board.bb
+            self.board.occ[:] = self.temp_board.occ
+            self.board.occ_all = self.temp_board.occ_all
             self.game.pieces.clear()
-            self.game.pieces.update(self.original_pieces)
+            # The copied pieces are new objects, so key them by their own ids again.
+            self.game.pieces.update({color: {id(piece): piece for piece in pieces.values()} for color, pieces in self.original_pieces.items()})
             self.game.captured_pieces.clear()
             self.game.captured_pieces.update(self.original_captured)
-            self.game.active_player = self.original_active_player
+            self.game.side = self.original_side
             self.game.moves = self.original_moves
             self.game.turn_number = self.original_turn_number
             self.game.halfmove_counter = self.original_halfmove_counter
+            self.game.king_sq = self.original_king_sq
             self.game.enpassants = self.enpassants
 
     _precomputed_square_names = [f'{letter}{number}' for letter in 'abcdefgh' for number in range(1, 9)]
+    _SQ_COLOR = tuple(Color.BLACK if (file + rank) % 2 == 0 else Color.WHITE for rank in range(8) for file in range(8))
 
     def __init__(self, console=None):
         """
         Initialize the chess board. Set up required variables and clear the board.
         """
         self.console = Console() if console is None else console
-        self.squares: dict[str, None | Piece] = {name: None for name in Board._precomputed_square_names}
+        self.clear()
         self.black_square_color = 'white'
         self.white_square_color = 'bright_white'
         self.black_piece_color = 'blue'
         self.white_piece_color = 'green'
         self.highlight_color = 'red'
+        self._square_styles = self._build_square_styles()
         self.logger = logging.getLogger("rich")
 
     def __deepcopy__(self, memo):
@@ -121,27 +149,43 @@ class Board:
         Overload the [] operator to access squares on the board.
 
         Parameters:
-        square (str): A string in chess notation representing the square. For example, 'd5'.
+        square (str | Location | int): A string in chess notation representing the square, for example 'd5',
+        a Location, or a square index from 0 (a1) to 63 (h8).
 
         Returns:
         Piece object if the square is occupied else None.
         """
         if isinstance(location, str):
+            return self.squares[SQUARE_INDEX[location]]
+        elif isinstance(location, (Location, int)):
             return self.squares[location]
-        elif isinstance(location, Location):
-            return self.squares[location.location]
 
-    def __setitem__(self, square: str | Location, piece: Piece | None):
+    def __setitem__(self, square: str | Location | int, piece: Piece | None):
         if isinstance(square, Location):
-            square = square.location
-        self.squares[square] = piece
+            index = square.index
+        elif isinstance(square, int):
+            index = square
+            square = SQUARE_NAMES[index]
+        else:
+            index = SQUARE_INDEX[square]
+        mask = 1 << index
+        old_piece = self.squares[index]
+        if old_piece is not None:
+            color = COLOR_INDEX[old_piece.color]
+            self.bb[color * 6 + old_piece.PTYPE] &= ~mask
+            self.occ[color] &= ~mask
+        self.squares[index] = piece
         if piece is not None:
+            color = COLOR_INDEX[piece.color]
+            self.bb[color * 6 + piece.PTYPE] |= mask
+            self.occ[color] |= mask
             piece.location = square
+        self.occ_all = self.occ[0] | self.occ[1]
 
     def add_piece(self, piece: Piece):
         location = str(piece.location)
         if self[location] is not None:
-            raise self.MoveException(self, f"Cannot add {piece} to {location}, already occupied by {self.squares[location]}")
+            raise self.MoveException(self, f"Cannot add {piece} to {location}, already occupied by {self[location]}")
         self[location] = piece
 
     def iter_square_names(self) -> Iterator[str]:
@@ -157,60 +201,43 @@ class Board:
         """
         Clear the board.
         """
-        self.squares: dict[str, None | Piece] = {name: None for name in Board._precomputed_square_names}
+        self.squares: list[None | Piece] = [None] * 64
+        # One bitboard per color and piece type, indexed color * 6 + piece type, plus the occupancy of each color.
+        self.bb: list[int] = [0] * 12
+        self.occ: list[int] = [0, 0]
+        self.occ_all: int = 0
 
     @staticmethod
-    def get_square_color(square: Location) -> Color:
+    def get_square_color(square: Location | str) -> Color:
         """
-        Check the color of the square, using the board's 8x8 grid and the chess rule of alternation.
+        Look up the color of the square in the precomputed table.
 
         Parameters:
         square (str): A string in chess notation representing the square. For example, 'd5'.
 
         Returns:
-        str: "black" if the square is black, "white" if the square is white.
+        Color: Color.BLACK if the square is black, Color.WHITE if the square is white.
         """
-        return Color.BLACK if (square.int_file - 98 + square.rank) % 2 == 0 else Color.WHITE
+        if isinstance(square, Location):
+            square = square.location
+        return Board._SQ_COLOR[SQUARE_INDEX[square]]
 
     @staticmethod
     def get_intermediate_squares(start: Location | str, end: Location | str) -> Iterator[Location]:
         """
         Get all squares that a piece must cross to get from start to end.
-        This does not include the end square but includes the start square.
+        This includes neither the start nor the end square.
 
         Parameters:
         start (str): The starting square in chess notation, for example, 'd5'.
         end (str): The ending square in chess notation, for example, 'e7'.
 
         Yields:
-        str: The squares in the path from start to end.
+        Location: The squares in the path from start to end, nearest to start first.
         """
-        if isinstance(start, str):
-            start = Location(start)
-        if isinstance(end, str):
-            end = Location(end)
-
-        move_distance = start - end
-
-        if abs(move_distance[0]) == abs(move_distance[1]):
-            # Diagonal move
-            step_x = 1 if start.int_file < end.int_file else -1
-            step_y = 1 if start.rank < end.rank else -1
-            for i in range(1, abs(move_distance[0])):
-                tmp = f'{chr(start.int_file + i * step_x)}{start.rank + i * step_y}'
-                yield Location(tmp)
-
-        elif abs(move_distance[0]) == 0:
-            # Vertical move e.g. B6 -> B2 - change in Rank
-            step = 1 if start.rank < end.rank else -1
-            for rank in range(start.rank + step, end.rank, step):
-                yield Location(f'{start.file}{rank}')
-
-        elif abs(move_distance[1]) == 0:
-            # Horizontal move e.g. D2 -> H2 - change in File
-            step = 1 if start.int_file < end.int_file else -1
-            for file in range(start.int_file + step, end.int_file, step):
-                yield Location(f'{chr(file)}{end.rank}')
+        start = start.index if isinstance(start, Location) else SQUARE_INDEX[start]
+        end = end.index if isinstance(end, Location) else SQUARE_INDEX[end]
+        return iter(_INTERMEDIATE_SQUARES[start][end])
 
     def is_move_clear(self, start: Location, end: Location) -> bool:
         """
@@ -223,13 +250,107 @@ class Board:
         Returns:
         bool: True if path is clear, False otherwise.
         """
-        intermediate_squares = list(self.get_intermediate_squares(start, end))
-        if not intermediate_squares:
-            return True
-        for square in intermediate_squares:
-            if self[square] is not None:
-                return False
-        return True
+        start = start.index if isinstance(start, Location) else SQUARE_INDEX[start]
+        end = end.index if isinstance(end, Location) else SQUARE_INDEX[end]
+        return BETWEEN[start][end] & self.occ_all == 0
+
+    def attacks_from(self, square: int, ptype: int, color: int) -> int:
+        """
+        Get the squares a piece of the given type and color standing on square attacks, given the current occupancy.
+
+        Parameters:
+        square (int): The square index, 0 (a1) to 63 (h8).
+        ptype (int): The piece type, one of bitboard.PAWN..KING.
+        color (int): The color index, 0 for white and 1 for black.
+
+        Returns:
+        int: A bitboard of the attacked squares.
+        """
+        if ptype == bitboard.PAWN:
+            return PAWN_ATTACKS[color][square]
+        if ptype == bitboard.KNIGHT:
+            return KNIGHT_ATTACKS[square]
+        if ptype == bitboard.KING:
+            return KING_ATTACKS[square]
+        attacks = 0
+        if ptype in (bitboard.ROOK, bitboard.QUEEN):
+            attacks |= rook_attacks(square, self.occ_all)
+        if ptype in (bitboard.BISHOP, bitboard.QUEEN):
+            attacks |= bishop_attacks(square, self.occ_all)
+        return attacks
+
+    def attackers_to(self, square: int, color: int) -> int:
+        """
+        Get all pieces of the given color that attack square.
+
+        Parameters:
+        square (int): The square index, 0 (a1) to 63 (h8).
+        color (int): The color index of the attacking side, 0 for white and 1 for black.
+
+        Returns:
+        int: A bitboard of the squares of the attacking pieces.
+        """
+        bb = self.bb
+        base = color * 6
+        # Attacks are symmetric, so look outwards from the target square with each piece type.
+        sliders = rook_attacks(square, self.occ_all) & (bb[base + bitboard.ROOK] | bb[base + bitboard.QUEEN])
+        sliders |= bishop_attacks(square, self.occ_all) & (bb[base + bitboard.BISHOP] | bb[base + bitboard.QUEEN])
+        return (sliders
+                | PAWN_ATTACKS[color ^ 1][square] & bb[base + bitboard.PAWN]
+                | KNIGHT_ATTACKS[square] & bb[base + bitboard.KNIGHT]
+                | KING_ATTACKS[square] & bb[base + bitboard.KING])
+
+    def pinned(self, square: int, color: int) -> int:
+        """
+        Get the pieces of the given color that are the only piece between square, usually their king, and an
+        opposing slider aimed at it. Moving one of them off that line can expose square.
+
+        Parameters:
+        square (int): The square index of the piece being shielded, 0 (a1) to 63 (h8).
+        color (int): The color index of the shielding side, 0 for white and 1 for black.
+
+        Returns:
+        int: A bitboard of the squares of the pinned pieces.
+        """
+        bb = self.bb
+        base = (color ^ 1) * 6
+        # Sliders that would attack square on an empty board, and so may be aimed at it through a single piece.
+        snipers = rook_attacks(square, 0) & (bb[base + bitboard.ROOK] | bb[base + bitboard.QUEEN])
+        snipers |= bishop_attacks(square, 0) & (bb[base + bitboard.BISHOP] | bb[base + bitboard.QUEEN])
+        pinned = 0
+        for sniper in bitboard.bits(snipers):
+            blockers = BETWEEN[square][sniper] & self.occ_all
+            if blockers and not blockers & (blockers - 1):
+                pinned |= blockers & self.occ[color]
+        return pinned
+
+    def attacked_squares(self, color: int, occupied: int | None = None) -> int:
+        """
+        Get every square attacked by at least one piece of the given color.
+        Cheaper than asking attackers_to about each square when several squares have to be checked.
+
+        Parameters:
+        color (int): The color index of the attacking side, 0 for white and 1 for black.
+        occupied (int, optional): The squares that block sliding pieces, the board's occupancy when None.
+
+        Returns:
+        int: A bitboard of the attacked squares.
+        """
+        bb = self.bb
+        base = color * 6
+        occupied = self.occ_all if occupied is None else occupied
+        attacks = 0
+        for square in bitboard.bits(bb[base + bitboard.PAWN]):
+            attacks |= PAWN_ATTACKS[color][square]
+        for square in bitboard.bits(bb[base + bitboard.KNIGHT]):
+            attacks |= KNIGHT_ATTACKS[square]
+        for square in bitboard.bits(bb[base + bitboard.KING]):
+            attacks |= KING_ATTACKS[square]
+        for square in bitboard.bits(bb[base + bitboard.ROOK] | bb[base + bitboard.QUEEN]):
+            attacks |= rook_attacks(square, occupied)
+        for square in bitboard.bits(bb[base + bitboard.BISHOP] | bb[base + bitboard.QUEEN]):
+            attacks |= bishop_attacks(square, occupied)
+        return attacks
 
     @staticmethod
     def is_valid_square_name(location: str) -> bool:
@@ -242,47 +363,56 @@ class Board:
         Returns:
         bool: True if the location is within the board, False otherwise.
         """
-        return location[0] in "abcdefgh" and location[1] in "12345678"
+        return location in SQUARE_INDEX
 
     def print(self, highlights: str | list[str] | None = None) -> None:
         self.console.print(self.create_board_text(highlights))
 
+    def _build_square_styles(self) -> tuple[tuple[dict, dict], ...]:
+        """
+        Precompute the rich style of every square, indexed a1..h8.
+
+        Returns:
+        tuple: For each square a (normal, highlighted) pair of dicts mapping the color of the piece on the square
+        (None when empty) to its style string, for example "green on bright_white".
+        """
+        styles = []
+        for square_color in self._SQ_COLOR:
+            normal = self.black_square_color if square_color == Color.BLACK else self.white_square_color
+            styles.append(tuple({None: f"{background} on {background}",
+                                 Color.WHITE: f"{self.white_piece_color} on {background}",
+                                 Color.BLACK: f"{self.black_piece_color} on {background}"}
+                                for background in (normal, self.highlight_color)))
+        return tuple(styles)
+
     def create_board_text(self, highlights: str | list[str] = None) -> Text:
         if isinstance(highlights, str):
             highlights = [highlights]
+        highlighted_squares = frozenset(SQUARE_INDEX.get(str(square)) for square in highlights) if highlights else frozenset()
+        squares = self.squares
+        square_styles = self._square_styles
 
         # Add file labels at the top
-        board_text = Text("  a b c d e f g h\n", style="bold white")
+        segments = [("  a b c d e f g h\n", "bold white")]
+        append = segments.append
 
         for number in range(8, 0, -1):
             # Add rank label at the start of each line
-            board_text.append(f"{number} ", style="bold white")
+            append((f"{number} ", "bold white"))
 
-            for letter in "abcdefgh":
-                square = f'{letter}{number}'
-                square_color = self.get_square_color(Location(square))
-                piece = self.squares[square]
+            for index in range((number - 1) * 8, number * 8):
+                piece = squares[index]
+                styles = square_styles[index][index in highlighted_squares]
 
                 if piece is not None:
-                    square_text = f'{piece} '
-                    piece_color = self.black_piece_color if piece.color == Color.BLACK else self.white_piece_color
+                    append((f'{piece} ', styles[piece.color]))
                 else:
-                    square_text = '  '
-                    piece_color = None
-
-                if highlights is not None and square in highlights:
-                    square_color = self.highlight_color
-                else:
-                    square_color = self.black_square_color if square_color == "black" else self.white_square_color
-
-                piece_color = square_color if piece_color is None else piece_color
-                square_style = f"{piece_color} on {square_color}"
-                board_text.append(text=square_text, style=square_style)
+                    append(('  ', styles[None]))
 
             # Add rank label at the end of each line
-            board_text.append(f" {number}\n", style="bold")
+            append((f" {number}\n", "bold"))
 
         # Add file labels at the bottom
-        board_text.append("  a b c d e f g h", style="bold")
+        segments.append(("  a b c d e f g h", "bold"))
 
-        return board_text
+        return Text.assemble(*segments)
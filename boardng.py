@@ -1,9 +1,26 @@
-from functools import cache
+from collections.abc import Iterator, Mapping
+from random import Random
+from types import MappingProxyType
+
+from bitboard import (BETWEEN, BLACK, KING_ATTACKS, KNIGHT_ATTACKS, PAWN_ATTACKS, PAWN_DOUBLE_PUSHES, PAWN_PUSHES, WHITE, bishop_attacks,
+                      bits, queen_attacks, rook_attacks)
+
+# Zobrist keys, one random 64-bit number per piece letter and square, indexed like Board.bb. The seed is fixed so a
+# position always hashes the same.
+_rng = Random(0x5EED)
+ZOBRIST = tuple(tuple(_rng.getrandbits(64) for _ in range(64)) for _ in range(12))
+del _rng
 
 
 class Board:
     index_to_square = {rank * 8 + file: f"{chr(file + 97)}{rank + 1}" for rank in range(8) for file in range(8)}
     square_to_index = {f"{chr(file + 97)}{rank + 1}": rank * 8 + file for rank in range(8) for file in range(8)}
+    # Piece letters in bitboard order, white pieces upper case.
+    pieces = 'PNBRQKpnbrqk'
+    piece_to_bb = {piece: index for index, piece in enumerate(pieces)}
+    starting_position = ['R', 'N', 'B', 'Q', 'K', 'B', 'N', 'R'] + ['P'] * 8 + [None] * 32 + ['p'] * 8 + ['r', 'n', 'b', 'q', 'k', 'b', 'n', 'r']
+    # How many positions compute_all_moves_and_captures remembers before dropping the oldest.
+    move_cache_size = 4096
 
     class BoardException(Exception):
         pass
@@ -15,13 +32,22 @@ class Board:
         self.add_piece(square, value)
 
     def __delitem__(self, square):
-        self.board[Board.square_to_index[square]] = None
+        self._remove_piece(Board._sq(square))
 
     def clear(self):
         self._initialize_board()
 
     def _initialize_board(self):
-        self.board: list[None | str] = [None] * 64
+        # One bitboard per piece letter, indexed as in Board.pieces, plus the occupancy of each side.
+        self.bb: list[int] = [0] * 12
+        self.occupied_white = 0
+        self.occupied_black = 0
+        self.occupied = 0
+        # The piece letter on every square, kept in step with the bitboards so lookups don't have to scan them.
+        self.mailbox: list[str | None] = [None] * 64
+        # Zobrist hash of the pieces on the board, updated with every piece placed, removed or moved.
+        self.hash = 0
+        self._move_cache: dict[int, Mapping] = {}
         self.black_king_moved = False
         self.white_king_moved = False
         self.black_kingside_rook_moved = False
@@ -30,55 +56,146 @@ class Board:
         self.white_queenside_rook_moved = False
 
     def setup_board(self):
-        self.board = ['R', 'N', 'B', 'Q', 'K', 'B', 'N', 'R'] + ['P'] * 8 + [None] * 32 + ['p'] * 8 + ['r', 'n', 'b', 'q', 'k', 'b', 'n', 'r']
+        self.bb = [0] * 12
+        self.occupied_white = self.occupied_black = self.occupied = 0
+        self.mailbox = [None] * 64
+        self.hash = 0
+        for index, piece in enumerate(Board.starting_position):
+            if piece is not None:
+                self._place_piece(piece, index)
+
+    def _place_piece(self, piece: str, index: int):
+        mask = 1 << index
+        self.bb[Board.piece_to_bb[piece]] |= mask
+        if piece.isupper():
+            self.occupied_white |= mask
+        else:
+            self.occupied_black |= mask
+        self.occupied |= mask
+        self.mailbox[index] = piece
+        self.hash ^= ZOBRIST[Board.piece_to_bb[piece]][index]
+
+    def _remove_piece(self, index: int) -> str | None:
+        piece = self._piece_at(index)
+        if piece is not None:
+            mask = ~(1 << index)
+            self.bb[Board.piece_to_bb[piece]] &= mask
+            self.occupied_white &= mask
+            self.occupied_black &= mask
+            self.occupied &= mask
+            self.mailbox[index] = None
+            self.hash ^= ZOBRIST[Board.piece_to_bb[piece]][index]
+        return piece
+
+    def _piece_at(self, index: int) -> str | None:
+        return self.mailbox[index]
+
+    @staticmethod
+    def _sq(square: str | int) -> int:
+        """
+        Get the index of a square, accepting either its name or its index.
+        """
+        return square if isinstance(square, int) else Board.square_to_index[square]
 
     def add_piece(self, piece, square):
-        index = Board.square_to_index[square]
-        if self.board[index] is not None:
-            raise Board.BoardException(f"Can't add {piece} to square {square}, already occupied by {self.board[index]}")
-        self.board[index] = piece
+        index = Board._sq(square)
+        if self.occupied & (1 << index):
+            raise Board.BoardException(f"Can't add {piece} to square {square}, already occupied by {self._piece_at(index)}")
+        self._place_piece(piece, index)
 
     def move_piece(self, start_square, end_square):
-        start_index = Board.square_to_index[start_square]
-        end_index = Board.square_to_index[end_square]
-        start_piece = self.board[start_index]
-        end_piece = self.board[end_index]
-        self.board[end_index] = start_piece
-        self.board[start_index] = None
-        if end_piece is not None:
-            return end_piece
+        start_index = Board._sq(start_square)
+        end_index = Board._sq(end_square)
+        if start_index == end_index:
+            return None
+        end_piece = self._remove_piece(end_index)
+        start_piece = self._piece_at(start_index)
+        if start_piece is not None:
+            # One XOR clears the start square and sets the end square in every board the piece belongs to.
+            move_mask = 1 << start_index | 1 << end_index
+            bb_index = Board.piece_to_bb[start_piece]
+            self.bb[bb_index] ^= move_mask
+            self.hash ^= ZOBRIST[bb_index][start_index] ^ ZOBRIST[bb_index][end_index]
+            if start_piece.isupper():
+                self.occupied_white ^= move_mask
+            else:
+                self.occupied_black ^= move_mask
+            self.occupied ^= move_mask
+            self.mailbox[end_index] = start_piece
+            self.mailbox[start_index] = None
+        assert self._is_consistent()
+        return end_piece
+
+    def _is_consistent(self) -> bool:
+        """
+        Recompute the occupancy boards, the mailbox and the hash from the piece boards and compare them with the
+        incrementally kept ones. Only meant for assertions.
+        """
+        white = black = 0
+        for bb in self.bb[:6]:
+            white |= bb
+        for bb in self.bb[6:]:
+            black |= bb
+        mailbox = [None] * 64
+        zobrist_hash = 0
+        for bb_index, (piece, bb) in enumerate(zip(Board.pieces, self.bb)):
+            for index in bits(bb):
+                mailbox[index] = piece
+                zobrist_hash ^= ZOBRIST[bb_index][index]
+        return ((white, black, white | black, mailbox, zobrist_hash) ==
+                (self.occupied_white, self.occupied_black, self.occupied, self.mailbox, self.hash))
 
     def get_piece(self, square):
-        return self.board[Board.square_to_index[square]]
+        return self._piece_at(Board._sq(square))
 
     def get_possible_moves(self, square) -> set[str] | None:
-        piece = self.get_piece(square)
+        index = Board._sq(square)
+        piece = self._piece_at(index)
         if piece is None:
             return None
-        if piece in 'pP':
-            moves = self.get_possible_pawn_moves(square)
+        clear_moves = self._possible_targets(index, piece)
+        if clear_moves:
+            return Board._names(clear_moves)
+
+    def _possible_targets(self, index: int, piece: str) -> int | None:
+        """
+        Get the bitboard of squares the piece on index can move to.
+        Knights can land on enemy pieces, every other piece only on empty squares.
+        """
+        empty = ~self.occupied
+        if piece == 'P':
+            # A double push also needs the square behind its target empty.
+            return (PAWN_PUSHES[WHITE][index] | PAWN_DOUBLE_PUSHES[WHITE][index] & empty << 8) & empty
+        elif piece == 'p':
+            return (PAWN_PUSHES[BLACK][index] | PAWN_DOUBLE_PUSHES[BLACK][index] & empty >> 8) & empty
         elif piece in 'rR':
-            moves = self.get_possible_rook_moves(square)
-        elif piece in 'nN':
-            moves = self.get_possible_knight_moves(square)
+            return rook_attacks(index, self.occupied) & empty
+        elif piece == 'N':
+            return KNIGHT_ATTACKS[index] & ~self.occupied_white
+        elif piece == 'n':
+            return KNIGHT_ATTACKS[index] & ~self.occupied_black
         elif piece in 'bB':
-            moves = self.get_possible_bishops_moves(square)
+            return bishop_attacks(index, self.occupied) & empty
         elif piece in 'kK':
-            moves = self.get_possible_king_moves(square)
-            print(1)
+            return KING_ATTACKS[index] & empty
         elif piece in 'qQ':
-            moves = self.get_possible_queen_moves(square)
-        else:
-            return None
-        if moves is not None:
-            moves.discard(square)
-            clear_moves = self.get_clear_moves(square, moves)
-            if clear_moves:
-                return clear_moves
+            return queen_attacks(index, self.occupied) & empty
+        return None
 
     def get_clear_moves(self, start: str, moves: set) -> set[str]:
-        clear_moves = {move for move in moves if self.is_move_clear(start, move)}
-        return clear_moves
+        index = Board._sq(start)
+        clear = self._clear_targets(index, self._piece_at(index))
+        return {move for move in moves if clear & (1 << Board.square_to_index[move])}
+
+    def _clear_targets(self, index: int, piece: str) -> int:
+        """
+        Get the bitboard of every square the piece on index could reach without jumping over or landing on a piece.
+        Squares that don't share a line with index have nothing in between, so only their own occupancy matters.
+        """
+        if piece in 'Nn':
+            return ~0
+        blocked = queen_attacks(index, 0) & ~queen_attacks(index, self.occupied)
+        return ~(self.occupied | blocked)
 
     @staticmethod
     def are_same_color(piece1: str, piece2: str) -> bool:
@@ -94,50 +211,51 @@ class Board:
         Returns:
         bool: True if both pieces are the same color, False otherwise.
         """
-        if piece1.isalpha() and piece2.isalpha():
-            return piece1.isupper() == piece2.isupper()
-        return False  # Return False if either input is not a valid piece representation
+        # ASCII upper and lower case letters differ only in bit 5.
+        return not (ord(piece1) ^ ord(piece2)) & 0x20
 
     def can_capture(self, square, target_square):
-        piece = self.get_piece(square)
-        target_piece = self.get_piece(target_square)
+        index = Board._sq(square)
+        target_index = Board._sq(target_square)
+        piece = self._piece_at(index)
+        target_piece = self._piece_at(target_index)
         if piece is None:
             raise Board.BoardException(f"None can't capture anything.")
         if target_piece is None:
             raise Board.BoardException(f"Can't capture a None.")
         if self.are_same_color(piece, target_piece):
             return False
-        if piece in 'Pp':
-            color = -1 if piece.islower() else 1
-            if ord(target_square[0]) in (ord(square[0]) + 1, ord(square[0]) - 1) and (square[1] + color == target_square[1]):
-                return True
-        elif self.get_piece(square) in 'Kk':
-            pass
-        else:
-            return target_square in self.get_possible_moves(square)
+        return bool(self._attacks(index, piece) & (1 << target_index))
+
+    def _attacks(self, index: int, piece: str) -> int:
+        """
+        Get the bitboard of squares the piece on index attacks, whatever stands on them.
+        """
+        if piece in 'pP':
+            return PAWN_ATTACKS[WHITE if piece == 'P' else BLACK][index]
+        elif piece in 'nN':
+            return KNIGHT_ATTACKS[index]
+        elif piece in 'bB':
+            return bishop_attacks(index, self.occupied)
+        elif piece in 'rR':
+            return rook_attacks(index, self.occupied)
+        elif piece in 'qQ':
+            return queen_attacks(index, self.occupied)
+        elif piece in 'kK':
+            return KING_ATTACKS[index]
+        return 0
+
+    @staticmethod
+    def _names(targets: int) -> set[str]:
+        return {Board.index_to_square[target] for target in bits(targets)}
 
     @staticmethod
-    @cache
     def generate_diagonal_moves(square):
-        diagonals = set()
-        # Check each diagonal direction [top-right, bottom-right, bottom-left, top-left]
-        for dx, dy in [(1, 1), (1, -1), (-1, -1), (-1, 1)]:
-            tx = ord(square[0]) - 97
-            ty = int(square[1]) - 1
-            while 0 <= tx + dx < 8 and 0 <= ty + dy < 8:
-                tx += dx
-                ty += dy
-                diagonals.add(chr(tx + 97) + str(ty + 1))
-        return diagonals
+        return Board._names(bishop_attacks(Board._sq(square), 0))
 
     @staticmethod
-    @cache
     def generate_horiz_vert_moves(square):
-        moves = set()
-        for r in '12345678':
-            moves.add(f"{square[0]}{r}")
-            moves.add(f"{chr(int(r) + 96)}{square[1]}")
-        return moves - {square}
+        return Board._names(rook_attacks(Board._sq(square), 0))
 
     @staticmethod
     def get_possible_queen_moves(square):
@@ -152,47 +270,30 @@ class Board:
         return Board.generate_diagonal_moves(square)
 
     @staticmethod
-    def _generate_moves_from_movelist(square, movelist):
-        moves = []
-        file = ord(square[0]) - 96
-        rank = int(square[1])
-
-        for move in movelist:
-            new_file = file + move[0]
-            new_rank = rank + move[1]
-            if 1 <= new_file <= 8 and 1 <= new_rank <= 8:
-                moves.append(f"{chr(new_file + 96)}{str(new_rank)}")
-        return set(moves)
-
-    @staticmethod
-    @cache
     def get_possible_knight_moves(square):
-        return Board._generate_moves_from_movelist(square, [(-2, -1), (-2, 1), (-1, -2), (-1, 2), (1, -2), (1, 2), (2, -1), (2, 1)])
+        return Board._names(KNIGHT_ATTACKS[Board._sq(square)])
 
     def get_possible_pawn_moves(self, square):
-        moves = []
-        color = -1 if self.get_piece(square).islower() else 1
-        moves.append(square[0] + str(int(square[1]) + color))
-        if (square[1] == '2' and color == 1) or (square[1] == '7' and color == -1):
-            moves.append(square[0] + str(int(square[1]) + color * 2))
-        return set(moves)
+        index = Board._sq(square)
+        color = WHITE if self._piece_at(index).isupper() else BLACK
+        return Board._names(PAWN_PUSHES[color][index] | PAWN_DOUBLE_PUSHES[color][index])
 
     @staticmethod
-    @cache
     def get_possible_king_moves(square):
-        return Board._generate_moves_from_movelist(square, [(0, -1), (0, 1), (1, 0), (-1, 0), (1, -1), (1, 1), (-1, -1), (-1, 1)])
+        return Board._names(KING_ATTACKS[Board._sq(square)])
 
     @staticmethod
-    @cache
-    def get_move_distance(start: str, end: str) -> tuple[int, int]:
-        return ord(end[0]) - ord(start[0]), int(end[1]) - int(start[1])
+    def get_move_distance(start: str | int, end: str | int) -> tuple[int, int]:
+        start = Board._sq(start)
+        end = Board._sq(end)
+        return end % 8 - start % 8, end // 8 - start // 8
 
     @staticmethod
-    @cache
-    def get_intermediate_squares(start: str, end: str) -> list[str]:
+    def get_intermediate_squares(start: str, end: str) -> Iterator[str]:
         """
-        Get all squares that a piece must cross to get from start to end.
+        Get all squares that a piece must cross to get from start to end, nearest first.
         This does not include the start square but includes the end square.
+        Move checks use the BETWEEN masks directly; this only turns a mask back into square names.
 
         Parameters:
         start (str): The starting square in chess notation, for example, 'd5'.
@@ -201,73 +302,81 @@ class Board:
         Yields:
         str: The squares in the path from start to end.
         """
-        start_file = ord(start[0])
-        start_rank = int(start[1])
-        end_file = ord(end[0])
-        end_rank = int(end[1])
-
-        move_distance = (end_file - start_file, end_rank - start_rank)
-        moves = []
-
-        if abs(move_distance[0]) == abs(move_distance[1]):
-            # Diagonal move
-            step_x = 1 if start_file < end_file else -1
-            step_y = 1 if start_rank < end_rank else -1
-            for i in range(1, abs(move_distance[0])):
-                moves.append(f'{chr(start_file + i * step_x)}{start_rank + i * step_y}')
-
-        elif abs(move_distance[0]) == 0:
-            # Vertical move e.g. B6 -> B2 - change in Rank
-            step = 1 if start_rank < end_rank else -1
-            for rank in range(start_rank + step, end_rank, step):
-                moves.append(f'{chr(start_file)}{rank}')
-
-        elif abs(move_distance[1]) == 0:
-            # Horizontal move e.g. D2 -> H2 - change in File
-            step = 1 if start_file < end_file else -1
-            for file in range(start_file + step, end_file, step):
-                moves.append(f'{chr(file)}{end_rank}')
-        moves.append(end)
-        return moves
+        start_index = Board._sq(start)
+        end_index = Board._sq(end)
+        between = BETWEEN[start_index][end_index]
+        # Square indices change monotonically along a ray, so walk the bits upwards or downwards with it.
+        if end_index > start_index:
+            for index in bits(between):
+                yield Board.index_to_square[index]
+        else:
+            while between:
+                index = between.bit_length() - 1
+                yield Board.index_to_square[index]
+                between ^= 1 << index
+        yield Board.index_to_square[end_index]
 
     def is_move_clear(self, start_square, end_square):
-        if self.get_piece(start_square) in 'Nn':
+        start = Board._sq(start_square)
+        return self._is_move_clear(start, Board._sq(end_square), self._piece_at(start))
+
+    def _is_move_clear(self, start: int, end: int, piece: str) -> bool:
+        if piece in 'Nn':
             return True
-        inter_squares = list(self.get_intermediate_squares(start_square, end_square))
-        for square in inter_squares:
-            if self.get_piece(square) is not None:
-                return False
-        return True
+        # The end square has to be empty too.
+        return (BETWEEN[start][end] | 1 << end) & self.occupied == 0
 
     def compute_all_moves_and_captures(self):
+        """
+        Get the moves and captures of every piece on the board, keyed by square.
+        Results are remembered by the position's Zobrist hash, so a position that comes up again is answered from the
+        cache. The result is shared with the cache, so it is a read-only mapping holding frozensets.
+        """
+        all_moves = self._move_cache.get(self.hash)
+        if all_moves is not None:
+            return all_moves
         all_moves = {}
-        for i, piece in enumerate(self.board):
-            if piece:
-                position = self.index_to_square[i]
-                result = self.get_possible_moves_and_captures(position)
-                if result:
-                    all_moves[position] = {'moves': result[0], 'captures': result[1]}
+        for i in bits(self.occupied):
+            result = self._moves_and_captures(i)
+            if result:
+                moves, captures = result
+                all_moves[self.index_to_square[i]] = MappingProxyType({'moves': frozenset(Board._names(moves)),
+                                                                       'captures': frozenset(Board._names(captures)) if captures else None})
+        all_moves = MappingProxyType(all_moves)
+        if len(self._move_cache) >= Board.move_cache_size:
+            # Dicts keep insertion order, so the first key is the oldest entry.
+            del self._move_cache[next(iter(self._move_cache))]
+        self._move_cache[self.hash] = all_moves
         return all_moves
 
     def get_possible_moves_and_captures(self, square):
-        possible_moves = self.get_possible_moves(square)
-        moves = set()
-        captures = set()
-        if not possible_moves:
+        result = self._moves_and_captures(Board._sq(square))
+        if result is None:
             return None
-        for move in possible_moves:
-            if self.get_piece(move) and self.can_capture(square, move):
-                captures.add(move)
-            else:
-                moves.add(move)
+        moves, captures = result
+        return Board._names(moves), Board._names(captures) if captures else None
+
+    def _moves_and_captures(self, index: int) -> tuple[int, int] | None:
+        """
+        Split the destinations of the piece on index into quiet moves and captures with one AND against the enemy pieces.
 
-        return moves, captures if captures else None
+        Returns:
+        tuple[int, int] | None: The (moves, captures) bitboards, or None if the piece has nowhere to go.
+        """
+        piece = self._piece_at(index)
+        if piece is None:
+            return None
+        targets = self._possible_targets(index, piece)
+        if not targets:
+            return None
+        enemies = self.occupied_black if piece.isupper() else self.occupied_white
+        return targets & ~enemies, targets & enemies
 
     def print(self):
         print('   abcdefgh  ')
         for i in range(8):
             print(8 - i, '|', end='')
-            print(''.join([_ if _ is not None else ' ' for _ in self.board[i * 8: (i + 1) * 8]]), end='')
+            print(''.join([_ if _ is not None else ' ' for _ in map(self._piece_at, range(i * 8, (i + 1) * 8))]), end='')
             print(f'|{8 - i}')
         print('   abcdefgh  ')
 
@@ -87,26 +87,24 @@ class MoveTransformer(Transformer):
                 self.process_element(arg)
 
     def process_element(self, element):
-        if isinstance(element, Tree):
-            print(1)
         element_type = element.get('type', None)
         if element_type is not None:
             if element_type in ("range", "normal_move", "leap"):
                 self.move_dict["move_type"] = element.get('value')
                 # self.move_dict["distance"]["type"]
             else:
-                try:
+                if element_type in self.move_dict:
                     self.move_dict[element_type].append(element.get('value'))
-                except KeyError:
-                    print(1)
 
 
 new_failed = []
 
+# Building the LALR tables dominates a single run, so build the parser once and let Lark cache the tables on disk.
+with open('fairy.lark', 'r') as infile:
+    _PARSER = Lark(infile, start='move', parser='lalr', debug=True, cache=True, transformer=MoveTransformer())
 
-def test_moves(move_list, filename):
-    with open(filename, 'r') as infile:
-        parser = Lark(infile, start='move', parser='lalr', debug=True, transformer=MoveTransformer())
+
+def test_moves(move_list, parser=_PARSER):
     for move in move_list:
         try:
             # print(f"Parsing move: {move}")
@@ -127,4 +125,4 @@ failed = ['n+, 1X', 'o1>, c1X>', 'n+.nX, nX.n+', 'on+, cnX', 'o1>, c1X>, io2>',
           'c^n(~1/2), on(~1/2)', 'cn*, o1*', '1<>.nX>', 'on*, c~1/2', '1*>, io2*>', 'n(~1/2), n(~1/3)', '~1/3, ~1/4', '1X, 1-4+', 'cn(^nX), o1X>', '~3/4', 'cn(^2X), o1X', 'nX, 1>', 'on*, c^n*', 'nX, n>', '2X.n+', 'o1>, c1X>,~ 0/3,~ 3/3', 'c^n+, on+', '1*, ~2+', '1*>, 1<', '1*, ~1/2', 'o1>, c1X>, io3>', '2(~1/2), 1-4+', 'c~1/2, o1/2', '1-4>, 1X<', 'cn(^2>=), o1>=', 'o1*>, c1*>', 'on>, cnX>', 'o1X>, c1>, io2X>', '2+, 2X, ~1/2, ~1/3', '1+, ~3+', '~1/2, ~3/4', 'n*, n(~1/2)', '1X,~1/2',
           '~2=, ~1/2<>', 'nX, n<=, 1>, ~2>', '2/3', '~1/2, ~2/3', 'o1X>, c1>=, io2X>', '1*, ~2+, ~2X', '1X.n+, 1+.nX', '1X, 1<', '~1/2, ~1/3,n*', 'cn(^nX^2n+), onX', '~2/3.nX', 'nX>, n<', 'n<>, 1*', '1X, 1>=', '~2/2, ~1/3']
 
-test_moves(failed, filename='fairy.lark')
+test_moves(failed)
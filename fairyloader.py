@@ -1,11 +1,23 @@
+import os
+
 from bs4 import BeautifulSoup
 import requests
-import ujson
+import orjson
+
+PAGE_URL = 'https://en.wikipedia.org/wiki/List_of_fairy_chess_pieces'
+PAGE_CACHE = 'fairy_pieces.html'
 
-webpage=requests.get('https://en.wikipedia.org/wiki/List_of_fairy_chess_pieces')
+# Only hit Wikipedia when there's no local copy of the page yet; delete the cache to refresh it.
+if os.path.exists(PAGE_CACHE):
+    with open(PAGE_CACHE, 'r', encoding='utf-8') as infile:
+        html = infile.read()
+else:
+    html = requests.get(PAGE_URL).text
+    with open(PAGE_CACHE, 'w', encoding='utf-8') as outfile:
+        outfile.write(html)
 
 # Parse HTML
-soup = BeautifulSoup(webpage.text, 'html.parser')
+soup = BeautifulSoup(html, 'html.parser')
 
 # Find the table containing fairy chess pieces
 table = soup.find('table', {'class': 'wikitable'})
@@ -24,4 +36,5 @@ for row in rows[1:]:  # skip header row
         notes = cols[5].get_text(strip=True)
         chess_pieces.append({'name': name, 'bcps': bcps, 'parlett': parlett, 'betza': betza, 'notes': notes})
 
-ujson.dump(chess_pieces, open('tests/chess_pieces.json', 'w'))
+with open('tests/chess_pieces.json', 'wb') as outfile:
+    outfile.write(orjson.dumps(chess_pieces, option=orjson.OPT_INDENT_2))
@@ -1,16 +1,65 @@
 import logging
 import re
-from copy import deepcopy
+from collections import defaultdict
+from dataclasses import dataclass
 
 from rich.console import Console
 from rich.logging import RichHandler
 
+import bitboard
 from board import Board
 from pieces import Pawn, Rook, Bishop, Knight, Queen, King, Piece
-from utils import Color, Location
+from utils import ANTICOLOR, Color, COLOR_INDEX, COLORS, Location, SQUARE_INDEX, SQUARE_NAMES
+
+_SAN_RE = re.compile(r'((?P<start_type>[KQNBR])?(?P<start_square>[a-h][1-8]?)?(?P<capture>x)?(?P<end_type>[KQNBR])?(?P<end_square>[a-h][1-8])=?(?P<promotion>[KQNBR])?(?P<check>\+)?)?(?P<kscastle>O-O)?(?P<qscastle>O-O-O)?(?P<checkmate>#)?')
+_SAN_PIECE_TYPES = {'K': King, 'Q': Queen, 'R': Rook, 'B': Bishop, 'N': Knight}
+# Piece classes a pawn can promote to, by SAN letter and by name
+_PROMOTION_TYPES = {'Q': Queen, 'R': Rook, 'B': Bishop, 'N': Knight,
+                    'Queen': Queen, 'Rook': Rook, 'Bishop': Bishop, 'Knight': Knight}
+_SAN_NO_GROUPS = dict.fromkeys(_SAN_RE.groupindex)
+# Piece classes indexed by Piece.PTYPE, and their FEN letters indexed by [color index][Piece.PTYPE]
+_PIECE_CLASSES = (Pawn, Knight, Bishop, Rook, Queen, King)
+_FEN_CHARS = ('PNBRQK', 'pnbrqk')
+# (square, piece class, color) of every piece in the standard starting position
+_BACK_RANK = (Rook, Knight, Bishop, Queen, King, Bishop, Knight, Rook)
+_START_POSITION = tuple((f'{file}{rank}', piece_type, color)
+                        for color, back_rank, pawn_rank in ((Color.WHITE, 1, 2), (Color.BLACK, 8, 7))
+                        for rank, piece_types in ((back_rank, _BACK_RANK), (pawn_rank, (Pawn,) * 8))
+                        for file, piece_type in zip('abcdefgh', piece_types))
+# Display names of the players, indexed like COLORS
+_PLAYER_NAMES = tuple(color.value.capitalize() for color in COLORS)
+# Castling rights bits returned by Game.can_castle, and the same bits indexed by side to move
+WHITE_KINGSIDE, WHITE_QUEENSIDE, BLACK_KINGSIDE, BLACK_QUEENSIDE = 1, 2, 4, 8
+_KINGSIDE_RIGHTS = (WHITE_KINGSIDE, BLACK_KINGSIDE)
+_QUEENSIDE_RIGHTS = (WHITE_QUEENSIDE, BLACK_QUEENSIDE)
+_FEN_CASTLING_ORDER = (WHITE_KINGSIDE, WHITE_QUEENSIDE, BLACK_KINGSIDE, BLACK_QUEENSIDE)
+# Piece types whose moves are exactly their attacks
+_ATTACK_MOVERS = frozenset((bitboard.KNIGHT, bitboard.BISHOP, bitboard.ROOK, bitboard.QUEEN))
+
+
+@dataclass(slots=True)
+class ParsedMove:
+    """
+    A SAN move broken into its parts by Game.parse_move. start_square and end_square are filled in further as the move
+    is expanded.
+    """
+    move: str
+    start_type: type[Piece]
+    end_type: type[Piece] | None
+    start_square: str | Location | None
+    end_square: str | Location | None
+    promotion: type[Piece] | bool
+    capture: bool
+    check: bool
+    checkmate: bool
+    king_castle: bool
+    queen_castle: bool
 
 
 class Game:
+    __slots__ = ('console', 'loglevel', 'logger', 'board', 'pieces', 'captured_pieces', 'turn_number', 'moves', 'halfmove_counter',
+                 'enpassants', 'castling', 'side', 'king_sq')
+
     class MoveException(Exception):
         def __init__(self, message: str, game: 'Game' = None) -> None:
             # super().__init__(message)
@@ -29,14 +78,16 @@ class Game:
         self.logger = logging.getLogger("__name__")
         self.logger.setLevel(self.loglevel)
         self.board = Board(console=self.console)
-        self.pieces = {Color.WHITE: [], Color.BLACK: []}
+        self.pieces = {Color.WHITE: {}, Color.BLACK: {}}
         self.captured_pieces = {Color.WHITE: [], Color.BLACK: []}
         self.turn_number = 1
         self.moves = []
         self.halfmove_counter = 0
         self.enpassants = None
         self.castling = []
-        self.active_player = Color.WHITE
+        self.side = 0  # index into COLORS of the player to move
+        # The square of each king as a Location, kept up to date by every move so the king never has to be looked for.
+        self.king_sq = {Color.WHITE: None, Color.BLACK: None}
         self.setup_board()
 
     @staticmethod
@@ -92,62 +143,48 @@ class Game:
 
     @property
     def antiplayer(self):
-        return Color.BLACK if self.active_player == Color.WHITE else Color.WHITE
+        return COLORS[self.side ^ 1]
+
+    @property
+    def active_player(self) -> Color:
+        return COLORS[self.side]
+
+    @active_player.setter
+    def active_player(self, color: Color):
+        self.side = COLOR_INDEX[color]
 
     def reset(self):
         """
         Clear the Game, and wipe the board
         """
         self.board.clear()
-        self.pieces = {Color.WHITE: [], Color.BLACK: []}
+        self.pieces = {Color.WHITE: {}, Color.BLACK: {}}
         self.captured_pieces = {Color.WHITE: [], Color.BLACK: []}
         self.turn_number = 1
         self.moves = []
         self.halfmove_counter = 0
         self.enpassants = []
         self.castling = []
-        self.active_player = Color.WHITE
+        self.side = 0
+        self.king_sq = {Color.WHITE: None, Color.BLACK: None}
         self.logger.trace("Finished resetting game board.")
 
     def setup_board(self):
         """
         Clear the Game, and wipe the board, then initialize the board with a standard set of pieces.
         """
-
-        self.board.clear()
         self.reset()
-
-        for square in self.board.iter_square_names():
-            row = square[1]
-            col = square[0]
-
-            if row in ('3', '4', '5', '6'):
-                self.board.squares[square] = None
-            elif row == '2':
-                self.add_piece(piece=Pawn(Color.WHITE, location=square))
-            elif row == '7':
-                self.add_piece(piece=Pawn(Color.BLACK, location=square))
-            elif row in ('1', '8'):
-                color = Color.WHITE if row == '1' else Color.BLACK
-                if col in ('a', 'h'):
-                    self.add_piece(piece=Rook(color, location=square))
-                elif col in ('b', 'g'):
-                    self.add_piece(piece=Knight(color, location=square))
-                elif col in ('c', 'f'):
-                    self.add_piece(piece=Bishop(color, location=square))
-                elif col == 'd':
-                    self.add_piece(piece=Queen(color, location=square))
-                elif col == 'e':
-                    self.add_piece(piece=King(color, location=square))
-        self.logger.trace(f"Finished setting up initial piece positions.")
+        for square, piece_type, color in _START_POSITION:
+            self.add_piece(piece=piece_type(color, location=square))
+        self.logger.trace("Finished setting up initial piece positions.")
 
     def _remove_piece(self, piece):
         # Not CAPTURE, but literally remove.
         # Should never be used outside of testing.
         self.board[piece.location] = None
-        for p in self.pieces[piece.color]:
-            if p.location == piece.location:
-                self.pieces[piece.color].remove(p)
+        if piece.PTYPE == bitboard.KING:
+            self.king_sq[piece.color] = None
+        self.pieces[piece.color].pop(id(piece), None)
 
     def _remove_piece_at_square(self, square):
         piece = self.board[square]
@@ -158,66 +195,82 @@ class Game:
         return piece
 
     def add_piece(self, piece):
-        self.pieces[piece.color].append(piece)
+        self.pieces[piece.color][id(piece)] = piece
         self.board.add_piece(piece=piece)
+        if piece.PTYPE == bitboard.KING:
+            self.king_sq[piece.color] = piece.location
 
     def get_king(self, color):
-        return [piece for piece in self.pieces[color] if piece.__class__.__name__ == 'King'][0]
+        return self.board[self.king_sq[color]]
 
     def move(self, start: Location | str, end: Location | str | None):
         if start in ("O-O", "O-O-O"):
             self.castle(start)
-            self.logger.info(f"Turn {self.turn_number}-{self.active_player.value.capitalize()}: Castles {'kingside' if start == 'O-O' else 'queenside'}")
+            self.logger.info("Turn %s-%s: Castles %s", self.turn_number, _PLAYER_NAMES[self.side], 'kingside' if start == 'O-O' else 'queenside')
             self.finalize_move(start, None)
             return
         start = Location(start) if isinstance(start, str) else start
         end = Location(end) if isinstance(end, str) else end
-        piece_piece = None
-        for x in self.pieces[self.active_player]:
-            if x.location == start:
-                piece_piece = x
-        # if piece_piece is None:
-        #     raise Game.MoveException('This should never happen!!!', self)
         # Ensure there is a piece at the start location
-        if self.board[start] is None:
+        board = self.board
+        moving_piece = board[start]
+        if moving_piece is None:
             raise Game.MoveException(f"No piece at {start}", self)
+        # The board holds the same piece objects as self.pieces, so it doubles as the square -> piece map.
+        piece_piece = moving_piece if moving_piece.color == self.active_player else None
 
         # Determine if the move is a capture or a standard move
         if end == self.enpassants:
-            # Handle en passant capture
             captured_piece = self.handle_enpassant(start, end)
         else:
-            if self.board[end] is not None:
-                # Handle regular capture
-                if not self.board[start].can_take(end, self):
-                    raise Game.MoveException(f"{self.board[start].string()} at {start} cannot capture {self.board[end].string()} at {end}", self)
-                captured_piece = self.board[end]
-                self.logger.info(f"{self.board[start]} captures {self.board[end]}")
-                # captured_piece.location = None  # Remove captured piece from the board
-                self.enpassants = None
+            target = board[end]
+            if target is not None:
+                captured_piece = self._move_capture(moving_piece, start, end, target)
             else:
-                # Handle non-capture move
-                if not self.board[start].can_move_to(end, self):
-                    raise Game.MoveException(f"{self.board[start].string()} at {start} can't move to {end}", self)
-                captured_piece = None
-
-            # Move the piece
-            self.board[end] = self.board[start]
-            self.board[start] = None
-            self.move_effects(start, end)
+                captured_piece = self._move_quiet(moving_piece, start, end)
 
         if captured_piece:
             self.captured_pieces[captured_piece.color].append(captured_piece)
-            for piece in self.pieces[captured_piece.color]:
-                if piece == captured_piece:
-                    self.pieces[captured_piece.color].remove(piece)
+            self.pieces[captured_piece.color].pop(id(captured_piece), None)
             captured_piece.location = None
         if piece_piece is None:
             raise Game.MoveException("Piece Piece is none.", self)
-        piece_piece.location = end
-        self.logger.info(f"Turn {self.turn_number}-{self.active_player.value.capitalize()}: {start} to {end}")
+        # Putting the piece on the board already moved its location along.
+        if piece_piece.PTYPE == bitboard.KING:
+            self.king_sq[piece_piece.color] = piece_piece.location
+        self.logger.info("Turn %s-%s: %s to %s", self.turn_number, _PLAYER_NAMES[self.side], start, end)
         self.finalize_move(start=start, end=end)
 
+    def _move_quiet(self, piece: Piece, start: Location, end: Location) -> None:
+        if not self._can_reach(piece, end, capture=False):
+            raise Game.MoveException(f"{piece.string()} at {start} can't move to {end}", self)
+        board = self.board
+        board[end] = piece
+        board[start] = None
+        piece.move_effects(start=start, end=end, game=self)
+
+    def _move_capture(self, piece: Piece, start: Location, end: Location, target: Piece) -> Piece:
+        if not self._can_reach(piece, end, capture=True):
+            raise Game.MoveException(f"{piece.string()} at {start} cannot capture {target.string()} at {end}", self)
+        self.logger.info("%s captures %s", piece, target)
+        self.enpassants = None
+        board = self.board
+        board[end] = piece
+        board[start] = None
+        piece.move_effects(start=start, end=end, game=self)
+        return target
+
+    def _can_reach(self, piece: Piece, end: Location, capture: bool) -> bool:
+        """
+        Check whether piece can move to, or capture on, end.
+        Knights and sliders move exactly like they attack, so one AND against their attack bitboard answers it;
+        pawns and kings have extra rules and still ask the piece.
+        """
+        if piece.PTYPE in _ATTACK_MOVERS:
+            board = self.board
+            return bool(piece.attacks_bb(board.occ_all) & ~board.occ[COLOR_INDEX[piece.color]] & (1 << end.index))
+        return piece.can_take(end, self) if capture else piece.can_move_to(end, self)
+
     def move_effects(self, start: Location, end: Location | None = None):
         if isinstance(end, str):
             end = Location(end)
@@ -226,125 +279,204 @@ class Game:
         self.board[end].move_effects(start=start, end=end, game=self)
 
     def make_compact_move(self, move: str):
-        self.logger.debug(f"=== Starting Turn {self.turn_number}-{self.active_player.value.capitalize()} ===")
-        self.logger.debug(f"Expanding {self.active_player.value.capitalize()}'s compact move '{move}'")
+        self.logger.debug("=== Starting Turn %s-%s ===", self.turn_number, _PLAYER_NAMES[self.side])
+        self.logger.debug("Expanding %s's compact move '%s'", _PLAYER_NAMES[self.side], move)
         parsed_move = self.parse_move(move)
         if move in ("O-O", "O-O-O"):
-            self.logger.trace(f"{self.active_player.value.capitalize()} is castling {'kingside' if move == 'O-O' else 'queenside'}")
+            self.logger.trace("%s is castling %s", _PLAYER_NAMES[self.side], 'kingside' if move == 'O-O' else 'queenside')
             self.move(move, None)
         else:
             expanded_move = self.expand_move(parsed_move)
             if expanded_move is None:
-                raise Game.MoveException(f"Could not expand {self.active_player.value.capitalize()}'s move: {move}")
-            self.logger.trace(f"Parsed {self.active_player.value.capitalize()}'s move {move} into {expanded_move[0]}{' -> ' + expanded_move[1] if expanded_move is not None and len(expanded_move) > 1 else ''}")
-            parsed_move['start_square'] = expanded_move[0]
-            parsed_move['end_square'] = expanded_move[1]
+                raise Game.MoveException(f"Could not expand {_PLAYER_NAMES[self.side]}'s move: {move}")
+            if self.logger.isEnabledFor(logging.TRACE):
+                self.logger.trace(f"Parsed {_PLAYER_NAMES[self.side]}'s move {move} into {expanded_move[0]}{' -> ' + expanded_move[1] if expanded_move is not None and len(expanded_move) > 1 else ''}")
+            parsed_move.start_square = expanded_move[0]
+            parsed_move.end_square = expanded_move[1]
             try:
                 self.move(start=expanded_move[0], end=expanded_move[1])
-                if parsed_move['promotion']:
+                if parsed_move.promotion:
 
-                    self.promote_pawn(expanded_move[1], parsed_move['promotion'])
+                    self.promote_pawn(expanded_move[1], parsed_move.promotion)
             except self.MoveException as e:
                 self.logger.error(e)
                 raise e
 
     @staticmethod
-    def parse_move(move: str) -> dict:
-        pattern = r'((?P<start_type>[KQNBR])?(?P<start_square>[a-h][1-8]?)?(?P<capture>x)?(?P<end_type>[KQNBR])?(?P<end_square>[a-h][1-8])=?(?P<promotion>[KQNBR])?(?P<check>\+)?)?(?P<kscastle>O-O)?(?P<qscastle>O-O-O)?(?P<checkmate>#)?'
-        parts = re.match(pattern, move)
-        type_dict = {'K': King, 'Q': Queen, 'R': Rook, 'B': Bishop, 'N': Knight}
-        return {'move': move,
-                'start_type': type_dict[parts['start_type']] if parts['start_type'] is not None else Pawn,
-                'end_type': type_dict[parts['end_type']] if parts['end_type'] is not None else None,
-                'start_square': parts['start_square'],
-                'end_square': parts['end_square'],
-                'promotion': type_dict[parts['promotion']] if parts['promotion'] else False,
-                'capture': True if parts['capture'] else False,
-                'check': True if parts['check'] else False,
-                'checkmate': True if parts['checkmate'] else False,
-                'king_castle': True if parts['kscastle'] else False,
-                'queen_castle': True if parts['qscastle'] else False}
+    def _match_simple_move(move: str) -> dict | None:
+        """
+        Split the most common move shapes - castling, 'e4', 'Nf3' and 'exd5' - into the groups `_SAN_RE` would give,
+        without running the regex.
+
+        Returns:
+        dict | None: The groups of the move, or None if it needs the full regex.
+        """
+        if move in ('O-O', 'O-O-O'):
+            # _SAN_RE tries the kingside group first, which matches the start of both.
+            return {**_SAN_NO_GROUPS, 'kscastle': 'O-O'}
+        length = len(move)
+        if length == 2:
+            if move[0] in 'abcdefgh' and move[1] in '12345678':
+                return {**_SAN_NO_GROUPS, 'end_square': move}
+        elif length == 3:
+            if move[0] in 'KQNBR' and move[1] in 'abcdefgh' and move[2] in '12345678':
+                return {**_SAN_NO_GROUPS, 'start_type': move[0], 'end_square': move[1:]}
+        elif length == 4:
+            if move[1] == 'x' and move[0] in 'abcdefgh' and move[2] in 'abcdefgh' and move[3] in '12345678':
+                return {**_SAN_NO_GROUPS, 'start_square': move[0], 'capture': 'x', 'end_square': move[2:]}
+        return None
+
+    @staticmethod
+    def parse_move(move: str) -> 'ParsedMove':
+        parts = Game._match_simple_move(move) or _SAN_RE.match(move).groupdict()
+        return ParsedMove(move=move,
+                          start_type=_SAN_PIECE_TYPES[parts['start_type']] if parts['start_type'] is not None else Pawn,
+                          end_type=_SAN_PIECE_TYPES[parts['end_type']] if parts['end_type'] is not None else None,
+                          start_square=parts['start_square'],
+                          end_square=parts['end_square'],
+                          promotion=_SAN_PIECE_TYPES[parts['promotion']] if parts['promotion'] else False,
+                          capture=True if parts['capture'] else False,
+                          check=True if parts['check'] else False,
+                          checkmate=True if parts['checkmate'] else False,
+                          king_castle=True if parts['kscastle'] else False,
+                          queen_castle=True if parts['qscastle'] else False)
 
     def expand_move(self, parsed_move) -> tuple[str, str | None] | tuple[str, str | None, str]:
-        if parsed_move['king_castle'] or parsed_move['queen_castle']:
+        if parsed_move.king_castle or parsed_move.queen_castle:
             return parsed_move, None
 
         parsed_move = self.determine_start_and_end_squares(parsed_move)
         possibles = self.find_possible_moves(parsed_move)
-        self.logger.debug(f"Found {len(possibles)} possible pieces for {self.active_player.value.capitalize()}'s move of {parsed_move['start_square'] if parsed_move['start_square'] is not None else ''}? to {parsed_move['end_square']}: {possibles}")
+        if self.logger.isEnabledFor(logging.DEBUG):
+            self.logger.debug(f"Found {len(possibles)} possible pieces for {_PLAYER_NAMES[self.side]}'s move of {parsed_move.start_square if parsed_move.start_square is not None else ''}? to {parsed_move.end_square}: {possibles}")
         if not possibles:
-            raise Game.MoveException(f"None of {self.active_player.value.capitalize()}'s {'piece' if parsed_move['start_type'] is None else parsed_move['start_type']}s can move to {parsed_move['end_square']}", self)
+            raise Game.MoveException(f"None of {_PLAYER_NAMES[self.side]}'s {'piece' if parsed_move.start_type is None else parsed_move.start_type}s can move to {parsed_move.end_square}", self)
+        # Out of check, only a king move, a pinned piece or an en passant capture can expose the king, so the other
+        # candidates don't need the move tried out.
+        king_square = self.king_sq[self.active_player]
+        if king_square is None:
+            exposing = 0
+        elif parsed_move.end_square == self.enpassants or self.is_king_in_check(self.active_player):
+            exposing = -1
+        else:
+            exposing = self.board.pinned(king_square.index, self.side) | (1 << king_square.index)
         possibles_after_self_check = []
         for p in possibles:
-            causes_check = self.does_move_cause_self_check(start=p.location, end=parsed_move['end_square'])
+            if p.color == self.active_player and not exposing & (1 << p.location.index):
+                possibles_after_self_check.append(p)
+                continue
+            causes_check = self.does_move_cause_self_check(start=p.location, end=parsed_move.end_square)
             if causes_check:
-                self.logger.debug(f"{self.active_player.value.capitalize()}'s move {parsed_move['move']} would put {self.active_player.value.capitalize()} into check from {causes_check} - eliminating possible move.")
+                self.logger.debug("%s's move %s would put %s into check from %s - eliminating possible move.", _PLAYER_NAMES[self.side], parsed_move.move, _PLAYER_NAMES[self.side], causes_check)
             else:
                 possibles_after_self_check.append(p)
 
         if not possibles_after_self_check:
-            raise self.MoveException(f"No moves found for {self.active_player.value.capitalize()}'s {parsed_move['move']} after running self-check detection, but had found {possibles} prior to checking.", self)
+            raise self.MoveException(f"No moves found for {_PLAYER_NAMES[self.side]}'s {parsed_move.move} after running self-check detection, but had found {possibles} prior to checking.", self)
         if len(possibles_after_self_check) > 1:
-            raise self.MoveException(f"Ambiguous move: {self.active_player.value.capitalize()}'s {parsed_move['move']} could refer to multiple pieces.", self)
-        return possibles_after_self_check[0].location, parsed_move['end_square']
+            raise self.MoveException(f"Ambiguous move: {_PLAYER_NAMES[self.side]}'s {parsed_move.move} could refer to multiple pieces.", self)
+        return possibles_after_self_check[0].location, parsed_move.end_square
 
     def determine_start_and_end_squares(self, parsed_move):
-        if parsed_move['start_type'].__qualname__ == 'King' and parsed_move['start_square'] is None:
-            parsed_move['start_square'] = self.find_king_location(self.active_player)
+        if parsed_move.start_type.PTYPE == bitboard.KING and parsed_move.start_square is None:
+            parsed_move.start_square = self.find_king_location(self.active_player)
         return parsed_move
 
     def find_possible_moves(self, parsed_move):
-        if parsed_move['capture']:
+        if parsed_move.capture:
             return self.find_possible_captures(parsed_move)
         else:
-            return self.who_can_move_to(location=parsed_move['end_square'], color_filter=self.active_player, piece_filter=parsed_move['start_type'].__qualname__, file_filter=parsed_move['start_square'][0] if parsed_move['start_square'] else None)
+            return self.who_can_move_to(location=parsed_move.end_square, color_filter=self.active_player, piece_filter=parsed_move.start_type.PTYPE, file_filter=parsed_move.start_square[0] if parsed_move.start_square else None)
 
     def find_possible_captures(self, parsed_move):
-        if self.enpassants and parsed_move['end_square'] in self.enpassants and parsed_move['start_type'].__qualname__ == 'Pawn' and self.board[parsed_move['end_square']] is None:
+        if self.enpassants and parsed_move.end_square in self.enpassants and parsed_move.start_type.PTYPE == bitboard.PAWN and self.board[parsed_move.end_square] is None:
             return self.handle_enpassant_possibility(parsed_move)
-        elif self.board[parsed_move['end_square']] is None:
-            raise self.MoveException(f"Illegal capture: no piece at {parsed_move['end_square']} for {self.active_player.value.capitalize()}'s move {parsed_move['move']}.", self)
+        elif self.board[parsed_move.end_square] is None:
+            raise self.MoveException(f"Illegal capture: no piece at {parsed_move.end_square} for {_PLAYER_NAMES[self.side]}'s move {parsed_move.move}.", self)
 
-        who_can = self.who_can_capture(parsed_move['end_square'], parsed_move['start_type'].__qualname__, parsed_move['start_square'][0] if parsed_move['start_square'] else None, self.active_player)
+        who_can = self.who_can_capture(parsed_move.end_square, parsed_move.start_type.PTYPE, parsed_move.start_square[0] if parsed_move.start_square else None, self.active_player)
         return who_can
 
     def does_move_cause_self_check(self, start, end):
-        with self.board.TempMove(self):
-            active_player = self.active_player
-            self.move(start, end)
-            self.active_player = active_player
-            is_check = self.is_king_in_check(self.active_player)
-            return is_check
+        undo = self._make_move_fast(start, end)
+        is_check = self.is_king_in_check(self.active_player)
+        self._unmake_move_fast(undo)
+        return is_check
+
+    def _make_move_fast(self, start, end) -> tuple:
+        """
+        Play a move on the board only, for looking at the resulting position.
+        Unlike `move` this doesn't validate, log, record captures or finish the turn - it only touches the squares
+        involved and the king square, and must be undone with `_unmake_move_fast` before anything else happens.
+
+        Returns:
+        tuple: The undo record to hand to `_unmake_move_fast`.
+        """
+        start = Location(start) if isinstance(start, str) else start
+        end = Location(end) if isinstance(end, str) else end
+        board = self.board
+        piece = board[start]
+        captured_square = end
+        if end == self.enpassants:
+            captured_square = end.index % 8 + (32 if self.side == bitboard.WHITE else 24)
+        captured_piece = board[captured_square]
+        old_king_square = self.king_sq[piece.color]
+        if captured_piece is not None:
+            board[captured_square] = None
+        board[start] = None
+        board[end] = piece
+        if piece.PTYPE == bitboard.KING:
+            self.king_sq[piece.color] = piece.location
+        return piece, start, end, captured_piece, captured_square, old_king_square
+
+    def _unmake_move_fast(self, undo: tuple):
+        piece, start, end, captured_piece, captured_square, old_king_square = undo
+        board = self.board
+        board[end] = None
+        board[start] = piece
+        if captured_piece is not None:
+            board[captured_square] = captured_piece
+        self.king_sq[piece.color] = old_king_square
 
     def finalize_move(self, start, end):
         if end is not None:
             self.moves.append((f"{start} {end}", (self.board[start], self.board[end])))
         elif start in ("O-O", "O-O-O"):
             self.moves.append(start)
-        self.active_player = Color.BLACK if self.active_player == Color.WHITE else Color.WHITE
-        self.check_for_checkmate()
+        # Only look for checkmate if the move actually gave check - the checkmate search is far more expensive.
+        opponent_king_square = self.king_sq[self.antiplayer]
+        if opponent_king_square is not None and self.square_attacked(opponent_king_square, by=self.active_player):
+            if self.check_for_checkmate():
+                self.logger.debug("%s's king has no escape squares.", _PLAYER_NAMES[self.side ^ 1])
+        self.side ^= 1
         self.halfmove_counter += 1
-        if self.active_player == Color.WHITE:
+        if self.side == 0:
             self.turn_number += 1
 
-    def promote_pawn(self, location: str, new_type):
+    def promote_pawn(self, location: str, new_type: type[Piece] | str):
+        if isinstance(new_type, str):
+            if new_type not in _PROMOTION_TYPES:
+                raise self.MoveException(f"{_PLAYER_NAMES[self.side]} you cannot promote to {new_type}", self)
+            new_type = _PROMOTION_TYPES[new_type]
         piece = self.board[location]
-        if piece is None or not isinstance(piece, Pawn):
-            raise self.MoveException(f"{self.active_player.value.capitalize()} you cannot promote piece at {location}, it is not a pawn", self)
+        if piece is None or piece.PTYPE != bitboard.PAWN:
+            raise self.MoveException(f"{_PLAYER_NAMES[self.side]} you cannot promote piece at {location}, it is not a pawn", self)
         if not ((piece.location[1] == "8" and piece.color == Color.WHITE) or (piece.location[1] == "1" and piece.color == Color.BLACK)):
-            raise self.MoveException(f"{self.active_player.value.capitalize()} you can only promote pawns in the end row", self)
+            raise self.MoveException(f"{_PLAYER_NAMES[self.side]} you can only promote pawns in the end row", self)
         self.board[location] = None
-        self.pieces[piece.color].remove(piece)
+        del self.pieces[piece.color][id(piece)]
         new_piece = new_type(piece.color, location)
         self.add_piece(new_piece)
 
     def handle_enpassant(self, start, end) -> Piece:
-        capture_rank = '5' if self.active_player == Color.WHITE else '4'
-        square_to_capture = f'{end[0]}{capture_rank}'
-        captured_piece = deepcopy(self.board[square_to_capture])
+        # The captured pawn stands on the end square's file, on the fifth rank for white and the fourth for black.
+        end_index = end.index if isinstance(end, Location) else SQUARE_INDEX[end]
+        square_to_capture = end_index % 8 + (32 if self.side == bitboard.WHITE else 24)
+        captured_piece = self.board[square_to_capture]
+        self.pieces[captured_piece.color].pop(id(captured_piece), None)
         self.board[square_to_capture] = None
         self._force_move(start, end)
-        self.captured_pieces[captured_piece.color].append(captured_piece)
+        # move() records the capture in captured_pieces, like it does for ordinary captures.
         if self.board[end] is not None:
             self.board[end].move_effects(start, end, self)
         return captured_piece
@@ -352,81 +484,97 @@ class Game:
     def who_can_move_to(self, location, color_filter=None, piece_filter=None, file_filter=None):
         if location is None:
             raise ValueError("Location cannot be None")
+        location = Location(location) if isinstance(location, str) else location
 
         color_filter = color_filter or self.active_player.value
         pieces = []
-        self.logger.trace(f"Checking if any of {self.active_player.value.capitalize()}'s {'piece' if piece_filter is None else piece_filter}s can move to {location}")
-
-        for piece in self.pieces[color_filter]:
-            if piece_filter is not None and piece.__class__.__name__ != piece_filter:
-                continue
-            if file_filter is not None and piece.location[0] != file_filter:
-                continue
-
+        tracing = self.logger.isEnabledFor(logging.TRACE)
+        if tracing:
+            self.logger.trace(f"Checking if any of {_PLAYER_NAMES[self.side]}'s {'piece' if piece_filter is None else _PIECE_CLASSES[piece_filter].TYPE_NAME}s can move to {location}")
+
+        color = COLOR_INDEX[color_filter]
+        candidates = self._move_candidates(location, color)
+        if piece_filter is not None:
+            candidates &= self.board.bb[color * 6 + piece_filter]
+        if file_filter is not None:
+            candidates &= bitboard.FILES[ord(file_filter) - ord('a')]
+        for origin in bitboard.bits(candidates):
+            piece = self.board.squares[origin]
             if piece.can_move_to(location, self):
-                logging_string = f"{piece.string()}@{piece.location} matches color filter '{color_filter.value.capitalize()}', matches file filter '{file_filter if file_filter is not None else piece.location[0]}' and can move to {location} - added to list of possibles."
-                self.logger.trace(logging_string)
+                if tracing:
+                    self.logger.trace(f"{piece.string()}@{piece.location} matches color filter '{color_filter.value.capitalize()}', matches file filter '{file_filter if file_filter is not None else piece.location[0]}' and can move to {location} - added to list of possibles.")
                 pieces.append(piece)
-        return deepcopy(pieces)
+        return pieces
 
     def castle(self, move: str):
-        can_castle = self.can_castle()
+        rights = self.can_castle()
         rank = 1 if self.active_player == Color.WHITE else 8
         if move == "O-O":
-            if not can_castle[self.active_player]['kingside']:
-                raise self.MoveException(f"{self.active_player.value.capitalize()} cannot castle Kingside.", self)
+            if not rights & _KINGSIDE_RIGHTS[self.side]:
+                raise self.MoveException(f"{_PLAYER_NAMES[self.side]} cannot castle Kingside.", self)
             self._force_move(f"e{rank}", f"g{rank}")
             self._force_move(f"h{rank}", f"f{rank}")
             self.board[f"g{rank}"].has_moved = True
             self.board[f"f{rank}"].has_moved = True
         elif move == "O-O-O":
-            if not can_castle[self.active_player]['queenside']:
-                raise self.MoveException(f"{self.active_player.value.capitalize()} cannot castle Queenside.", self)
+            if not rights & _QUEENSIDE_RIGHTS[self.side]:
+                raise self.MoveException(f"{_PLAYER_NAMES[self.side]} cannot castle Queenside.", self)
             self._force_move(f"e{rank}", f"c{rank}")
             self._force_move(f"a{rank}", f"d{rank}")
             self.board[f"c{rank}"].has_moved = True
             self.board[f"d{rank}"].has_moved = True
 
-    def can_castle(self) -> dict:
-        retval = {Color.WHITE: {'queenside': False, 'kingside': False}, Color.BLACK: {'queenside': False, 'kingside': False}}
-        if self.board['e1'] is not None and not self.board['e1'].has_moved and not self.who_can_capture('e1', color_filter=Color.BLACK):
-            retval[Color.WHITE]['queenside'] = (self.board['a1'] is not None and not self.board['a1'].has_moved
-                                                and self.board['d1'] is None and not self.who_can_capture('d1', color_filter=Color.BLACK)
-                                                and self.board['c1'] is None and not self.who_can_capture('c1', color_filter=Color.BLACK))
-            retval[Color.WHITE]['kingside'] = (self.board['h1'] is not None and not self.board['h1'].has_moved
-                                               and self.board['f1'] is None and not self.who_can_capture('f1', color_filter=Color.BLACK)
-                                               and self.board['g1'] is None and not self.who_can_capture('g1', color_filter=Color.BLACK))
-        if self.board['e8'] is not None and not self.board['e8'].has_moved and not self.who_can_capture('e8', color_filter=Color.WHITE):
-            retval[Color.BLACK]['queenside'] = (self.board['a8'] is not None and not self.board['a8'].has_moved
-                                                and self.board['d8'] is None and not self.who_can_capture('d8', color_filter=Color.WHITE)
-                                                and self.board['c8'] is None and not self.who_can_capture('c8', color_filter=Color.WHITE))
-            retval[Color.BLACK]['kingside'] = (self.board['h8'] is not None and not self.board['h8'].has_moved
-                                               and self.board['f8'] is None and not self.who_can_capture('f8', color_filter=Color.WHITE)
-                                               and self.board['g8'] is None and not self.who_can_capture('g8', color_filter=Color.WHITE))
-        return retval
-
-    def _force_move(self, start: str, end: str):
-        if isinstance(start, Location):
-            start = str(start.location)
-        if isinstance(end, Location):
-            end = str(end.location)
-        piece_piece = None
-        for x in self.pieces[self.active_player]:
-            if x.location == start:
-                piece_piece = x
-        piece_piece.location = end
-        piece = self.board[start]
-        self.board[start] = None
-        self.board[end] = piece
+    def can_castle(self) -> int:
+        """
+        Work out which castling moves are available right now: the king and rook haven't moved, the squares between
+        them are empty, and the king doesn't stand on or cross an attacked square.
+
+        Returns:
+        int: A bitmask of WHITE_KINGSIDE, WHITE_QUEENSIDE, BLACK_KINGSIDE and BLACK_QUEENSIDE.
+        """
+        rights = 0
+        board = self.board
+        squares = board.squares
+        # rank is the index of the a-file square of the color's back rank, the king starts on rank + 4.
+        for side, rank in ((bitboard.WHITE, 0), (bitboard.BLACK, 56)):
+            king = squares[rank + 4]
+            if king is None or king.has_moved:
+                continue
+            queen_rook, king_rook = squares[rank], squares[rank + 7]
+            queenside_right = queen_rook is not None and not queen_rook.has_moved
+            kingside_right = king_rook is not None and not king_rook.has_moved
+            # The attack map is the expensive part, so only build it while a castling right is left to check.
+            if not (queenside_right or kingside_right):
+                continue
+            # One attack map of the opponent answers all the squares the king stands on or passes over.
+            attacked = board.attacked_squares(side ^ 1)
+            if attacked & (1 << (rank + 4)):
+                continue
+            blocked = board.occ_all | attacked
+            if queenside_right and not blocked & (0b0001100 << rank):  # c and d files
+                rights |= _QUEENSIDE_RIGHTS[side]
+            if kingside_right and not blocked & (0b1100000 << rank):  # f and g files
+                rights |= _KINGSIDE_RIGHTS[side]
+        return rights
+
+    def _force_move(self, start: str | Location, end: str | Location):
+        # The board takes square names and Locations alike, and putting the piece down moves its location along.
+        board = self.board
+        piece = board[start]
+        board[start] = None
+        board[end] = piece
+        if piece.PTYPE == bitboard.KING:
+            self.king_sq[piece.color] = piece.location
 
     def handle_enpassant_possibility(self, parsed_move):
-        possibles = self.who_can_capture(parsed_move["end_square"], 'Pawn', parsed_move["start_square"][0] if parsed_move["start_square"] else None, self.active_player.value)
+        possibles = self.who_can_capture(parsed_move.end_square, bitboard.PAWN, parsed_move.start_square[0] if parsed_move.start_square else None, self.active_player.value)
         if len(possibles) != 1:
-            raise self.MoveException(f"En passant capture ambiguity for move {parsed_move['move']} found {len(possibles)} possiblities {possibles}.", self)
+            raise self.MoveException(f"En passant capture ambiguity for move {parsed_move.move} found {len(possibles)} possiblities {possibles}.", self)
         return possibles
 
-    def find_king_location(self, player_color):
-        return next(piece.location for piece in self.pieces[player_color] if isinstance(piece, King))
+    def find_king_location(self, player_color) -> Location | None:
+        # king_sq only ever holds Locations, whichever way the king got to its square.
+        return self.king_sq[player_color]
 
     def who_can_capture(self, location, piece_filter=None, file_filter=None, color_filter=None):
         if location is None:
@@ -437,42 +585,86 @@ class Game:
             if target is None:
                 color_filter = self.antiplayer
             else:
-                color_filter = target.anticolor()
-        for piece in self.pieces[color_filter]:
-            if piece_filter is not None and piece.__class__.__name__ != piece_filter:
-                continue
-            if file_filter is not None and piece.location[0] not in file_filter:
-                continue
-            if piece.can_take(location, self):
+                color_filter = target.opponent_color
+        square = location.index if isinstance(location, Location) else SQUARE_INDEX[location]
+        color = COLOR_INDEX[color_filter]
+        board = self.board
+        candidates = board.attackers_to(square, color)
+        if piece_filter is not None:
+            candidates &= board.bb[color * 6 + piece_filter]
+        if file_filter is not None:
+            candidates &= bitboard.FILES[ord(file_filter) - ord('a')]
+        # Knights and sliders take exactly what they attack, unless it is their own piece; pawns and kings have
+        # extra rules and still ask the piece.
+        own_square = board.occ[color] & (1 << square)
+        for origin in bitboard.bits(candidates):
+            piece = board.squares[origin]
+            if piece.PTYPE in _ATTACK_MOVERS:
+                if not own_square:
+                    pieces.append(piece)
+            elif piece.can_take(location, self):
                 pieces.append(piece)
-        return deepcopy(pieces)
+        return pieces
 
     def get_capture_map(self):
-        capture_map = {}
-        for square in self.board.iter_square_names():
-            possible_captures = self.who_can_capture(square)
-            if possible_captures:
-                capture_map[square] = possible_captures
-        return capture_map
+        """
+        Get, for every square, the pieces that can capture on it - the opponent of the piece standing there, or the
+        player not to move for an empty square - as `who_can_capture` would list them.
+        Walks each piece's attacks once instead of asking `who_can_capture` about all 64 squares.
+
+        Returns:
+        dict: Square names mapped to the list of pieces that can capture there, for squares that have any.
+        """
+        board = self.board
+        squares = board.squares
+        antiplayer = self.antiplayer
+        attackers = defaultdict(list)
+        # Ascending squares keep each list in the order who_can_capture would produce.
+        for origin in bitboard.bits(board.occ_all):
+            piece = squares[origin]
+            color = COLOR_INDEX[piece.color]
+            for square in bitboard.bits(board.attacks_from(origin, piece.PTYPE, color)):
+                target = squares[square]
+                if (antiplayer if target is None else target.opponent_color) != piece.color:
+                    continue
+                name = SQUARE_NAMES[square]
+                if piece.can_take(name, self):
+                    attackers[name].append(piece)
+        return {square: attackers[square] for square in board.iter_square_names() if square in attackers}
+
+    def square_attacked(self, square, by) -> bool:
+        """
+        Check whether any of the pieces of colour `by` can take on the Location `square`.
+        Stops at the first attacker found, unlike `who_can_capture` which collects all of them.
+        """
+        return self.board.attackers_to(square.index, COLOR_INDEX[by]) != 0
+
+    def _move_candidates(self, location, color: int) -> int:
+        """
+        Get a bitboard of the squares holding pieces of `color` that could geometrically reach the Location `location`.
+        Pieces outside of it can be skipped without asking them, pieces inside still have to confirm with `can_move_to`.
+        """
+        square = location.index
+        board = self.board
+        candidates = board.attackers_to(square, color) & ~board.bb[color * 6 + bitboard.PAWN]
+        # Pawns move straight ahead, one or two squares.
+        behind = (square - 8, square - 16) if color == bitboard.WHITE else (square + 8, square + 16)
+        for origin in behind:
+            if 0 <= origin < 64:
+                candidates |= board.bb[color * 6 + bitboard.PAWN] & (1 << origin)
+        return candidates
 
     def is_king_in_check(self, player):
-        king = self.get_king(player)
-        attackers = self.who_can_capture(king.location, color_filter=self.antiplayer)
-        if attackers:
-            # self.logger.info(f"King's attackers found: {attackers}")
-            x = self.get_king(player)
-            return attackers
-        return False
+        king_square = self.king_sq[player]
+        if king_square is None:
+            return False
+        return self.square_attacked(king_square, by=ANTICOLOR[player])
 
     def check_for_checkmate(self):
-        try:
-            opponent_king = [x for x in self.pieces[self.antiplayer] if isinstance(x, King)][0]
-        except IndexError:
+        opponent_king_square = self.king_sq[self.antiplayer]
+        if opponent_king_square is None:
             return False
-        else:
-            if opponent_king.is_checkmate(self):
-                return True
-        return False
+        return self.board[opponent_king_square].is_checkmate(self)
 
     def export_to_fen(self):
         """
@@ -481,33 +673,28 @@ class Game:
         Returns:
         str: The FEN string representing the current game state.
         """
-        fen = ""
+        squares = self.board.squares
+        occupied = self.board.occ_all
+        ranks = []
         for number in range(8, 0, -1):
+            if not (occupied >> ((number - 1) * 8)) & 0xFF:
+                ranks.append("8")
+                continue
+            rank = []
             empty_count = 0
-            for letter in "abcdefgh":
-                piece = self.board[f'{letter}{number}']
+            for piece in squares[(number - 1) * 8:number * 8]:
                 if piece is None:
                     empty_count += 1
-                elif isinstance(piece, Piece):
-                    if empty_count > 0:
-                        fen += str(empty_count)
-                        empty_count = 0
-                    if piece.__class__.__name__ == "Knight":
-                        piece_name = "N"
-                    else:
-                        piece_name = str(piece.__class__.__name__)[0]
-                    if piece.color == Color.WHITE:
-                        fen += piece_name.upper()
-                    else:
-                        fen += piece_name.lower()
-            if empty_count > 0:
-                fen += str(empty_count)
-            if number > 1:
-                fen += "/"
-        fen += f"{' w' if self.turn_number % 2 == 1 else ' b'} {self.fen_can_castle()}"
-        fen += " -"  # En passant target square: This is a square over which a pawn has just passed while moving two squares. If there is no en passant target square, use "-"
-        fen += f" {str(self.halfmove_counter)} {str(self.turn_number)}"
-        return fen
+                    continue
+                if empty_count:
+                    rank.append(str(empty_count))
+                    empty_count = 0
+                rank.append(_FEN_CHARS[COLOR_INDEX[piece.color]][piece.PTYPE])
+            if empty_count:
+                rank.append(str(empty_count))
+            ranks.append("".join(rank))
+        # En passant target square: This is a square over which a pawn has just passed while moving two squares. If there is no en passant target square, use "-"
+        return " ".join(("/".join(ranks), 'w' if self.turn_number % 2 == 1 else 'b', self.fen_can_castle(), "-", str(self.halfmove_counter), str(self.turn_number)))
 
     def fen_can_castle(self) -> str:
         """
@@ -517,8 +704,5 @@ class Game:
         str: A string representing the castling availability. 'KQkq' means that both kings can castle to both sides.
         '-' means no king can castle anymore.
         """
-        can_castle = self.can_castle()
-        retval = f'{"K" if can_castle[Color.WHITE]["kingside"] else ""}{"Q" if can_castle[Color.WHITE]["queenside"] else ""}{"k" if can_castle[Color.BLACK]["kingside"] else ""}{"q" if can_castle[Color.BLACK]["queenside"] else ""}'
-        if retval == "":
-            retval = '-'
-        return retval
+        rights = self.can_castle()
+        return ''.join(letter for letter, right in zip('KQkq', _FEN_CASTLING_ORDER) if rights & right) or '-'
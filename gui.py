@@ -8,6 +8,10 @@ from kivy.uix.gridlayout import GridLayout
 from board import Board
 from pieces import Pawn, Knight, Bishop, Rook, Queen, King, Piece
 
+# Index of each square in ChessBoard.children. Squares are added from a8 to h1, and Kivy keeps the most recently
+# added widget first, so h1 is 0 and a8 is 63.
+_SQUARE_TO_INDEX = {f"{letter}{number}": (number - 1) * 8 + (ord('h') - ord(letter)) for letter in "abcdefgh" for number in range(1, 9)}
+
 
 class ChessSquare(Button):
     """
@@ -32,8 +36,7 @@ class ChessSquare(Button):
         self.name: str = name
         self.board_widget: ChessBoard = board_widget
         super().__init__(background_color=color, background_normal='', background_down='', halign='center', valign='center', font_name='DejaVuSans-Bold.ttf', **kwargs)
-        self.bind(size=lambda instance, value: setattr(instance, 'text_size', value))
-        self.bind(size=self.adjust_font_size)
+        self.fbind('size', self._sync_text_size)
         self.piece: Piece | None = None
 
     def __str__(self) -> str:
@@ -43,16 +46,9 @@ class ChessSquare(Button):
         return f"ChessSquare(name={self.name}, board_widget={self.board_widget})"
 
     @staticmethod
-    def adjust_font_size(button: Button, new_size: tuple[int, int]) -> None:
-        """
-        Adjust the font size based on the button's size.
-
-        Parameters:
-            button (Button): The button to adjust.
-            new_size (tuple[int, int]): The new size of the button.
-        """
-        max_font_size = min(new_size[0], new_size[1])
-        button.font_size = max_font_size * 1.2
+    def _sync_text_size(button: Button, new_size: tuple[int, int]) -> None:
+        # Wrap and align the label within the whole square.
+        button.text_size = new_size
 
     def add(self, piece: Piece) -> None:
         """
@@ -81,12 +77,7 @@ class ChessSquare(Button):
         Returns:
             int: The index of the square.
         """
-        try:
-            col = ord('h') - ord(square[0])
-        except TypeError:
-            return -1  # Return an invalid index
-        row = int(square[1]) - 1
-        return row * 8 + col
+        return _SQUARE_TO_INDEX.get(square, -1)  # -1 for anything that isn't a square name
 
     def draw_moves(self) -> None:
         """
@@ -94,15 +85,12 @@ class ChessSquare(Button):
         """
         if self.piece is None:
             return
-        possible_moves = self.piece.get_all_possible_moves()
-        for move in possible_moves:
-            if self.name == move:
-                continue
-            elif self.board_widget[move].piece is not None and self.piece.can_take(move):
-                self.board_widget[move].background_color = self.board_widget.capture_background
-            elif self.piece.can_move_to(move) and self.board_widget[move].piece is None:
-                self.board_widget[move].background_color = self.board_widget.highlight_color
-        self.background_color = self.board_widget.selected_background
+        captures, quiet_moves = self.piece.split_moves(self.board_widget.app.board)
+        for move in captures:
+            self.board_widget._set_highlight(move, self.board_widget.capture_background)
+        for move in quiet_moves:
+            self.board_widget._set_highlight(move, self.board_widget.highlight_color)
+        self.board_widget._set_highlight(self.name, self.board_widget.selected_background)
 
     def on_press(self) -> None:
         """
@@ -144,10 +132,15 @@ class ChessBoard(GridLayout):
         for number in range(8, 0, -1):
             for letter in "abcdefgh":
                 self.add_widget(ChessSquare(name=f"{letter}{number}", board_widget=self, color=self.get_square_color(f"{letter}{number}")))
+        # The squares by name and by children index, and the unhighlighted background of each in the same order
+        self._by_name = {square.name: square for square in self.children}
+        self._by_index = list(self.children)
+        self._default_colors = [self.get_square_color(square.name) for square in self._by_index]
+        # Indices of the squares whose background differs from their default
+        self._dirty: set[int] = set()
 
-    def __getitem__(self, item: str) -> ChessSquare:
-        index = ChessSquare.square_to_index(item)
-        return self.children[index]
+    def __getitem__(self, item: str | int) -> ChessSquare:
+        return self._by_name[item] if isinstance(item, str) else self._by_index[item]
 
     def add(self, index: str | int, piece: King | Queen | Knight | Bishop | Rook | Pawn):
         self[index].add(piece)
@@ -156,10 +149,16 @@ class ChessBoard(GridLayout):
         is_dark_square = ((8 - int(square[1])) + (ord(square[0]) - ord('a'))) % 2 == 0
         return self.black_square_color if is_dark_square else self.white_square_color
 
+    def _set_highlight(self, square: str, color: list[float]) -> None:
+        index = _SQUARE_TO_INDEX[square]
+        self._by_index[index].background_color = color
+        self._dirty.add(index)
+
     def reset_square_colors(self):
-        for letter in "abcdefgh":
-            for number in range(1, 9):
-                self[f"{letter}{number}"].background_color = self.get_square_color(f"{letter}{number}")
+        # Only the squares highlighted since the last reset need their colour back.
+        for index in self._dirty:
+            self._by_index[index].background_color = self._default_colors[index]
+        self._dirty.clear()
 
 
 class ChessGui(App):
@@ -177,6 +176,8 @@ class ChessGui(App):
         self.halfturn_counter = 0
         self.selected_square = None
         self.selected_piece = None
+        # The piece shown on each square, indexed like ChessBoard.children, so a refresh only touches what changed
+        self._last_snapshot: list[Piece | None] = [None] * 64
 
     def build(self):
         master_layout = BoxLayout(orientation='horizontal')
@@ -193,28 +194,30 @@ class ChessGui(App):
             self.rect_squares = Rectangle(size=self.board_widget.size, pos=self.board_widget.pos)
 
         # Add binding to update rectangle size and position when layouts change
-        self.left_layout.bind(pos=self.update_rect, size=self.update_rect)
-        self.right_layout.bind(pos=self.update_rect, size=self.update_rect)
-        self.board_widget.bind(pos=self.update_rect, size=self.update_rect)
+        for layout in (self.left_layout, self.right_layout, self.board_widget):
+            layout.fbind('pos', self.update_rect)
+            layout.fbind('size', self.update_rect)
 
         # Add widgets to master_layout
         master_layout.add_widget(self.left_layout)
         master_layout.add_widget(self.board_widget)
         master_layout.add_widget(self.right_layout)
 
-        self.board_widget.bind(size=self.adjust_square_sizes)
+        self.board_widget.fbind('size', self.adjust_square_sizes)
         return master_layout
 
     def adjust_square_sizes(self, instance, *args):
 
-        # Calculate the size for each square
+        # Calculate the size for each square, and of the piece glyphs on them
         square_size = min(instance.width / 8, instance.height / 8)
+        font_size = square_size * 1.2
 
         # Update the size of each square
         for square in self.board_widget.children:
             square.size_hint = (None, None)
             square.size = (square_size, square_size)
             square.text_size = (square_size, square_size)
+            square.font_size = font_size
 
     def update_rect(self, instance, *args):
         if instance == self.left_layout:
@@ -229,14 +232,17 @@ class ChessGui(App):
 
     def load_state_from(self, board: Board):
         self.board = board
-        for square_name in Board.iter_square_names():
-            piece = board[square_name]
+        snapshot = self._last_snapshot
+        for index, square in enumerate(self.board_widget._by_index):
+            piece = board[square.name]
+            if piece is snapshot[index]:
+                continue
+            snapshot[index] = piece
             if piece is not None:
-                Logger.debug(f"ChessGui: adding {piece} {piece.location} to {square_name}")
-                self.board_widget[square_name].add(piece)
-                assert piece == self.board_widget[square_name].piece
+                Logger.debug(f"ChessGui: adding {piece} {piece.location} to {square.name}")
+                square.add(piece)
             else:
-                self.board_widget[square_name].clear()
+                square.clear()
 
 
 if __name__ == "__main__":
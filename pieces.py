@@ -1,7 +1,18 @@
-from utils import Color, Location
+import logging
+
+import bitboard
+from utils import ANTICOLOR, Color, COLOR_INDEX, Location, SQUARE_NAMES
+
+
+def _square_names(bb: int) -> set[str]:
+    return {SQUARE_NAMES[square] for square in bitboard.bits(bb)}
 
 
 class Piece:
+    PTYPE = None  # index of the piece type in the board bitboards, see bitboard.PAWN..KING
+    TYPE_NAME = None
+    __slots__ = ('_location', 'int_vert', 'int_horz', 'color', 'opponent_color', 'points', 'has_moved')
+
     class MoveException(Exception):
         pass
 
@@ -13,19 +24,20 @@ class Piece:
             self.int_vert = location.rank
             self.int_horz = location.int_file
         self.color = color
+        self.opponent_color = ANTICOLOR[color]
         self.points = None
         self.has_moved = False
 
     def __deepcopy__(self, memo):
         result = self.__class__(self.color, self.location)
         memo[id(self)] = result
-        for k, v in self.__dict__.items():
-            if k not in ['_location', 'int_vert', 'int_horz']:
-                setattr(result, k, v)
+        for k in Piece.__slots__:
+            if k not in ['_location', 'int_vert', 'int_horz'] and hasattr(self, k):
+                setattr(result, k, getattr(self, k))
         return result
 
     def string(self):
-        return f'{self.color.value} {self.__class__.__name__}'
+        return f'{self.color.value} {self.TYPE_NAME}'
 
     def __eq__(self, other):
         if not isinstance(other, Piece):
@@ -55,14 +67,23 @@ class Piece:
             self.int_horz = value.int_file
 
     def anticolor(self):
-        if self.color == Color.BLACK:
-            return Color.WHITE
-        else:
-            return Color.BLACK
+        return self.opponent_color
 
     def can_move_to(self, location: str | Location, game):
         raise NotImplementedError
 
+    def attacks_bb(self, occupied: int) -> int:
+        """
+        Get the squares this piece attacks from its current square.
+
+        Parameters:
+        occupied (int): The bitboard of all occupied squares, which blocks sliding pieces.
+
+        Returns:
+        int: A bitboard of the attacked squares.
+        """
+        raise NotImplementedError
+
     def can_take(self, location: str | Location, game) -> bool:
         if game.board[location] is not None:
             if game.board[location].color == self.color:
@@ -76,11 +97,31 @@ class Piece:
                 possible_moves.append(square)
         return possible_moves
 
+    def split_moves(self, board) -> tuple[set[str], set[str]]:
+        """
+        Get the squares this piece can go to, split into captures and quiet moves, from the board's bitboards alone.
+
+        Parameters:
+        board (Board): The board the piece stands on.
+
+        Returns:
+        tuple[set[str], set[str]]: The squares holding an opposing piece it can take, and the empty squares it can move to.
+        """
+        if self.location is None:
+            return set(), set()
+        # Knights and sliders go exactly where they attack.
+        targets = self.attacks_bb(board.occ_all)
+        return _square_names(targets & board.occ[COLOR_INDEX[self.opponent_color]]), _square_names(targets & ~board.occ_all)
+
     def move_effects(self, start: Location, end: Location, game):
         game.board.enpassants = []
 
 
 class Pawn(Piece):
+    PTYPE = bitboard.PAWN
+    TYPE_NAME = 'Pawn'
+    __slots__ = ()
+
     def __init__(self, color, location):
         super().__init__(color=color, location=location)
         self.points = 1
@@ -94,6 +135,20 @@ class Pawn(Piece):
     def __repr__(self):
         return f"Pawn('{self.color}', '{self.location}')"
 
+    def attacks_bb(self, occupied: int) -> int:
+        return bitboard.PAWN_ATTACKS[0 if self.color == Color.WHITE else 1][self.location.index]
+
+    def split_moves(self, board) -> tuple[set[str], set[str]]:
+        if self.location is None:
+            return set(), set()
+        color, square = COLOR_INDEX[self.color], self.location.index
+        captures = bitboard.PAWN_ATTACKS[color][square] & board.occ[color ^ 1]
+        pushes = bitboard.PAWN_PUSHES[color][square] & ~board.occ_all
+        # The double push needs the square in front to be free as well.
+        if pushes and not self.has_moved:
+            pushes |= bitboard.PAWN_DOUBLE_PUSHES[color][square] & ~board.occ_all
+        return _square_names(captures), _square_names(pushes)
+
     def _enpassant_squares(self) -> tuple[str] | tuple[str, str] | list:
         if self.has_moved:
             return []
@@ -115,7 +170,8 @@ class Pawn(Piece):
                 return f"{chr(ord(h) - 1)}{v + 1}", f"{chr(ord(h) + 1)}{v + 1}"
 
     def move_effects(self, start: Location | str, end: Location, game):
-        game.logger.debug(f"Running move_effects for {game.board[end].string()} at {end}")
+        if game.logger.isEnabledFor(logging.DEBUG):
+            game.logger.debug(f"Running move_effects for {game.board[end].string()} at {end}")
         if isinstance(start, str):
             start = Location(start)
         if isinstance(end, str):
@@ -157,12 +213,18 @@ class Pawn(Piece):
         move_distance = self.location - location
         if move_distance[0] in (1, -1) and ((move_distance[1] == -1 and self.color == Color.WHITE) or (move_distance[1] == 1 and self.color == Color.BLACK)):
             return True
-        if game.enpassants is not None and str(location) in game.enpassants and game.board[location].__class__.__name__ == "Pawn":
-            return True
+        if game.enpassants is not None and str(location) in game.enpassants:
+            target = game.board[location]
+            if target is not None and target.PTYPE == bitboard.PAWN:
+                return True
         return False
 
 
 class Knight(Piece):
+    PTYPE = bitboard.KNIGHT
+    TYPE_NAME = 'Knight'
+    __slots__ = ()
+
     def __init__(self, color, location):
         super().__init__(color=color, location=location)
         self.points = 3
@@ -176,6 +238,9 @@ class Knight(Piece):
     def __repr__(self):
         return f"Knight('{self.color}', '{self.location}')"
 
+    def attacks_bb(self, occupied: int) -> int:
+        return bitboard.KNIGHT_ATTACKS[self.location.index]
+
     def can_move_to(self, location, game):
         if self.location is None:
             return False
@@ -184,6 +249,10 @@ class Knight(Piece):
 
 
 class Bishop(Piece):
+    PTYPE = bitboard.BISHOP
+    TYPE_NAME = 'Bishop'
+    __slots__ = ()
+
     def __init__(self, color, location):
         super().__init__(color=color, location=location)
         self.points = 3
@@ -197,6 +266,9 @@ class Bishop(Piece):
     def __repr__(self):
         return f"Bishop('{self.color}', '{self.location}')"
 
+    def attacks_bb(self, occupied: int) -> int:
+        return bitboard.bishop_attacks(self.location.index, occupied)
+
     def can_move_to(self, location, game):
         if self.location is None:
             return False
@@ -207,6 +279,10 @@ class Bishop(Piece):
 
 
 class Rook(Piece):
+    PTYPE = bitboard.ROOK
+    TYPE_NAME = 'Rook'
+    __slots__ = ()
+
     def __init__(self, color, location):
         super().__init__(color=color, location=location)
         self.points = 5
@@ -220,6 +296,9 @@ class Rook(Piece):
     def __repr__(self):
         return f"Rook('{self.color}', '{self.location}')"
 
+    def attacks_bb(self, occupied: int) -> int:
+        return bitboard.rook_attacks(self.location.index, occupied)
+
     def can_move_to(self, location, game):
         if self.location is None:
             return False
@@ -235,6 +314,10 @@ class Rook(Piece):
 
 
 class Queen(Piece):
+    PTYPE = bitboard.QUEEN
+    TYPE_NAME = 'Queen'
+    __slots__ = ()
+
     def __init__(self, color, location):
         super().__init__(color=color, location=location)
         self.points = 9
@@ -248,6 +331,9 @@ class Queen(Piece):
     def __repr__(self):
         return f"Queen('{self.color}', '{self.location}')"
 
+    def attacks_bb(self, occupied: int) -> int:
+        return bitboard.queen_attacks(self.location.index, occupied)
+
     def can_move_to(self, location, game):
         if self.location is None:
             return False
@@ -260,6 +346,10 @@ class Queen(Piece):
 
 
 class King(Piece):
+    PTYPE = bitboard.KING
+    TYPE_NAME = 'King'
+    __slots__ = ()
+
     def __init__(self, color, location):
         super().__init__(color=color, location=location)
         self.points = 100
@@ -273,25 +363,32 @@ class King(Piece):
     def __repr__(self):
         return f"King('{self.color}', '{self.location}')"
 
+    def attacks_bb(self, occupied: int) -> int:
+        return bitboard.KING_ATTACKS[self.location.index]
+
     def move_effects(self, start: str | Location, end: Location, game):
         self.has_moved = True
 
+    def split_moves(self, board) -> tuple[set[str], set[str]]:
+        if self.location is None:
+            return set(), set()
+        square = self.location.index
+        # The king may not step onto an attacked square. Take it off the board first, so it doesn't hide the squares
+        # behind it from a slider that is checking it.
+        attacked = board.attacked_squares(COLOR_INDEX[self.opponent_color], board.occ_all & ~(1 << square))
+        targets = bitboard.KING_ATTACKS[square] & ~attacked
+        return _square_names(targets & board.occ[COLOR_INDEX[self.opponent_color]]), _square_names(targets & ~board.occ_all)
+
     def is_in_check(self, board):
-        for piece in board.pieces[self.anticolor()]:
+        for piece in board.pieces[self.opponent_color].values():
             if piece.can_take(self.location, board):
                 return True
         return False
 
     def is_checkmate(self, game):
-        for y in (-1, 0, 1):
-            for x in (-1, 0, 1):
-                if x == 0 and y == 0:  # Skip the square where the king currently is
-                    continue
-                target_square = f"{chr(ord(self.location[0]) + x)}{(int(self.location[1]) + y)}"
-                if not game.board.is_valid_square_name(target_square):
-                    continue
-                if self.can_move_to(target_square, game):
-                    return False
+        for target_square in bitboard.bits(bitboard.KING_ATTACKS[self.location.index]):
+            if self.can_move_to(SQUARE_NAMES[target_square], game):
+                return False
         return True
 
     def can_move_to(self, location, game):
@@ -301,8 +398,8 @@ class King(Piece):
         if location is None:
             raise ValueError("Location cannot be None")
 
-        for piece in game.pieces[self.anticolor()]:
-            if piece.__class__.__name__ == "King":
+        for piece in game.pieces[self.opponent_color].values():
+            if piece.PTYPE == bitboard.KING:
                 continue
             if piece.can_take(location, game):
                 return False
@@ -114,3 +114,19 @@ class TestBoardNg:
         x=board.compute_all_moves_and_captures()
         print(1)
 
+    def test_compute_all_moves_and_captures_cache_is_read_only(self):
+        board = Board()
+        board.setup_board()
+        all_moves = board.compute_all_moves_and_captures()
+        with pytest.raises(TypeError):
+            all_moves['e2'] = None
+        with pytest.raises(TypeError):
+            all_moves['e2']['moves'] = set()
+        with pytest.raises(AttributeError):
+            all_moves['e2']['moves'].add('e5')
+        fresh = Board()
+        fresh.setup_board()
+        # The second lookup comes from the cache and still matches a freshly computed one.
+        assert board.compute_all_moves_and_captures() == fresh.compute_all_moves_and_captures()
+        assert board.compute_all_moves_and_captures()['e2']['moves'] == {'e3', 'e4'}
+
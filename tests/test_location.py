@@ -69,3 +69,11 @@ class TestLocationEqualityAndHashing:
         assert hash(loc_a) == hash(loc_b), "Two Location instances with the same state should have the same hash value"
         loc_set = {loc_a, loc_b}
         assert len(loc_set) == 1, "A set should eliminate duplicate Location instances based on their state"
+
+
+class TestLocationIndex:
+    @pytest.mark.parametrize("location_str, index", [("a1", 0), ("h1", 7), ("e4", 28), ("a8", 56), ("h8", 63)])
+    def test_index(self, location_str, index):
+        location = Location(location_str)
+        assert location.index == index
+        assert list(range(64))[location] == index, "A Location should be usable as a list index"
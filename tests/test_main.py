@@ -73,6 +73,8 @@ class TestChessGame:
         assert test_game.board['d6'] == Pawn(Color.WHITE, 'd6')
         assert test_game.board['d5'] is None
         assert isinstance(test_game.captured_pieces[Color.BLACK][-1], Pawn)
+        assert len(test_game.captured_pieces[Color.BLACK]) == 1
+        assert test_game.captured_pieces[Color.BLACK][0].location is None
 
     def test_castling_success(self, test_game):
         # Clear the path for castling
@@ -106,6 +108,14 @@ class TestChessGame:
         assert isinstance(test_game.board['c8'], King)
         assert isinstance(test_game.board['d8'], Rook)
 
+    def test_find_king_location_after_castling(self, test_game):
+        for move in ('e4', 'e5', 'Nf3', 'Nc6', 'Bc4', 'Bc5', 'O-O'):
+            test_game.make_compact_move(move)
+        king_location = test_game.find_king_location(Color.WHITE)
+        assert isinstance(king_location, Location)
+        assert king_location == 'g1' and king_location.index == 6
+        assert isinstance(test_game.find_king_location(Color.BLACK), Location)
+
     def test_castling_failure(self, test_game):
         # Clear the path for castling
         test_game._remove_piece_at_square('g1')
@@ -351,6 +361,49 @@ class TestChessGame:
         assert isinstance(test_game.captured_pieces[Color.BLACK][0], Pawn)
         assert test_game.captured_pieces[Color.BLACK][0].color == Color.BLACK
 
+    def test_pinned_pieces(self, test_game):
+        test_game.reset()
+        test_game.add_piece(King(Color.WHITE, "e1"))
+        test_game.add_piece(Knight(Color.WHITE, "e2"))
+        test_game.add_piece(Bishop(Color.WHITE, "d2"))
+        test_game.add_piece(Pawn(Color.WHITE, "f2"))
+        test_game.add_piece(Pawn(Color.BLACK, "g3"))
+        test_game.add_piece(Rook(Color.BLACK, "e8"))
+        test_game.add_piece(Bishop(Color.BLACK, "b4"))
+        test_game.add_piece(Queen(Color.BLACK, "h4"))
+        # The knight and bishop are pinned; the black pawn on g3 also stands between the queen and the pawn on f2.
+        pinned = test_game.board.pinned(Location("e1").index, 0)
+        assert pinned == (1 << Location("e2").index) | (1 << Location("d2").index)
+        with pytest.raises(Game.MoveException):
+            test_game.make_compact_move("Nc3")
+
+    def test_split_moves(self, test_game):
+        # The GUI hands split_moves the Board it displays, so call it with the board rather than the game.
+        board = test_game.board
+        assert board['b1'].split_moves(board) == (set(), {'a3', 'c3'})
+        assert board['e2'].split_moves(board) == (set(), {'e3', 'e4'})
+        assert board['a1'].split_moves(board) == (set(), set())
+        test_game.add_piece(Pawn(Color.BLACK, "d3"))
+        assert board['e2'].split_moves(board) == ({'d3'}, {'e3', 'e4'})
+        assert board['c2'].split_moves(board) == ({'d3'}, {'c3', 'c4'})
+        assert board['f1'].split_moves(board) == (set(), set())
+        test_game._remove_piece_at_square('e2')
+        assert board['f1'].split_moves(board) == ({'d3'}, {'e2'})
+        # The pawn on d3 covers e2, so the king can't go there
+        assert board['e1'].split_moves(board) == (set(), set())
+
+    def test_split_moves_on_bare_board(self):
+        board = Board()
+        king = King(Color.WHITE, "e2")
+        board.add_piece(king)
+        board.add_piece(Rook(Color.BLACK, "e8"))
+        board.add_piece(Pawn(Color.WHITE, "b2"))
+        board.add_piece(Knight(Color.BLACK, "b3"))
+        # The rook's check runs through the king, so e1 is covered as well as e3, and the knight covers d2.
+        assert king.split_moves(board) == (set(), {'d1', 'd3', 'f1', 'f2', 'f3'})
+        assert board['b2'].split_moves(board) == (set(), set())
+        assert board['b3'].split_moves(board) == (set(), {'a1', 'c1', 'd2', 'd4', 'c5', 'a5'})
+
     def test_get_intermediate_squares(self):
         assert list(Board.get_intermediate_squares('a2', 'a5')) == ['a3', 'a4']
         assert list(Board.get_intermediate_squares('a1', 'a8')) == ['a2', 'a3', 'a4', 'a5', 'a6', 'a7']
@@ -432,3 +485,29 @@ class TestChessGame:
         assert test_game.board['b4'] is None
         assert test_game.captured_pieces == {Color.WHITE: [], Color.BLACK: []}
         assert len(test_game.pieces[Color.WHITE]) == 16
+        assert all(test_game.board[piece.location] is piece for piece in test_game.pieces[Color.WHITE].values())
+
+    def test_king_square_is_location(self, test_game):
+        test_game._remove_piece_at_square('e2')
+        test_game.active_player = Color.WHITE
+        test_game.move('e1', 'e2')
+        assert isinstance(test_game.king_sq[Color.WHITE], Location) and test_game.king_sq[Color.WHITE] == 'e2'
+        undo = test_game._make_move_fast('e2', 'd3')
+        assert isinstance(test_game.king_sq[Color.WHITE], Location) and test_game.king_sq[Color.WHITE] == 'd3'
+        test_game._unmake_move_fast(undo)
+        assert isinstance(test_game.king_sq[Color.WHITE], Location) and test_game.king_sq[Color.WHITE] == 'e2'
+        test_game._force_move('e2', 'f3')
+        assert isinstance(test_game.king_sq[Color.WHITE], Location) and test_game.king_sq[Color.WHITE] == 'f3'
+
+    def test_pieces_tracked_by_identity(self, test_game):
+        pawn = test_game.board['e2']
+        twin = Pawn(Color.WHITE, 'e2')
+        assert twin == pawn
+        with pytest.raises(TypeError):
+            hash(pawn)
+        # Removing a piece that is equal to, but not the same object as, a tracked one leaves the tracked one alone.
+        test_game.pieces[Color.WHITE].pop(id(twin), None)
+        assert len(test_game.pieces[Color.WHITE]) == 16
+        test_game._remove_piece(pawn)
+        assert len(test_game.pieces[Color.WHITE]) == 15
+        assert pawn not in test_game.pieces[Color.WHITE].values()
@@ -6,7 +6,21 @@ class Color(Enum):
     BLACK = 'Black'
 
 
+# Index of each color in per-color tables such as the board bitboards, and the reverse lookup.
+COLOR_INDEX = {Color.WHITE: 0, Color.BLACK: 1}
+COLORS = (Color.WHITE, Color.BLACK)
+# The opposing color of each color.
+ANTICOLOR = {Color.WHITE: Color.BLACK, Color.BLACK: Color.WHITE}
+
+
+# Squares are numbered 0..63 from a1 to h8, rank by rank.
+SQUARE_NAMES = tuple(f'{file}{rank}' for rank in range(1, 9) for file in 'abcdefgh')
+SQUARE_INDEX = {name: index for index, name in enumerate(SQUARE_NAMES)}
+
+
 class Location:
+    __slots__ = ('location', 'file', 'int_file', 'rank', 'index')
+
     class LocationException(Exception):
         pass
 
@@ -14,7 +28,7 @@ class Location:
     def _valid_locations(location):
         if len(location) != 2 or not isinstance(location, str):
             raise Location.LocationException(f'Location must be a string of length 2, not {location}')
-        return location[0] in "abcdefgh" and location[1] in "12345678"
+        return location in SQUARE_INDEX
 
     def __init__(self, location: str):
         self.location = str(location).lower()
@@ -23,6 +37,7 @@ class Location:
         self.file = self.location[0]  # A-H
         self.int_file = ord(self.file)
         self.rank = int(self.location[1])  # 1-8
+        self.index = SQUARE_INDEX[self.location]  # 0 (a1) - 63 (h8)
 
     def __repr__(self):
         return f"{self.location}"
@@ -30,6 +45,10 @@ class Location:
     def __str__(self):
         return f"{self.location}"
 
+    def __index__(self):
+        # Lets a Location index the 64-entry square tables directly, e.g. board.squares[location].
+        return self.index
+
     def __getitem__(self, item):
         if not isinstance(item, int):
             raise TypeError("Only integers are allowed")